@@ -3,6 +3,17 @@
 import sys
 import codecs
 from setuptools import setup
+from setuptools.command.build_py import build_py
+
+
+class BuildPy(build_py):
+    # yurl.aiolinks uses async generators, which are syntax errors
+    # before python 3.6, so the module is not installed there.
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+        if sys.version_info < (3, 6):
+            modules = [m for m in modules if m[:2] != ('yurl', 'aiolinks')]
+        return modules
 
 
 setup(name='YURL',
@@ -12,6 +23,8 @@ setup(name='YURL',
       author='Aleksadr Karpinsky',
       author_email='homm86@gmail.com',
       url='http://github.com/homm/yurl/',
-      packages=['yurl'],
+      packages=['yurl', 'yurl.bench'],
+      package_data={'yurl': ['public_suffix_list.dat']},
       test_suite='test',
+      cmdclass={'build_py': BuildPy},
 )
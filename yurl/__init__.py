@@ -1,8 +1,18 @@
 import re
+from array import array
 from collections import namedtuple
 
-from .utils import (_restore, split_url, decode_url, decode_url_component,
-                    remove_dot_segments)
+from .utils import (_restore, _split_re, _text_type, _to_bytes,
+                    _decode_buffer, split_url,
+                    split_url_spans, split_urls, decode_url, decode_url_component,
+                    encode_url_component, remove_dot_segments,
+                    join_dot_segments, _has_dot_segments,
+                    _join_dot_segments, normalize_percent_encoding,
+                    LRUCache, InternTable, QueryParams, parse_query,
+                    encode_query, remove_query_params, update_query,
+                    classify_host, HOST_EMPTY, HOST_NAME, HOST_IPV4,
+                    HOST_IPV6, HOST_IPVFUTURE, HOST_INVALID,
+                    host_to_ascii, host_to_unicode)
 
 # This module based on rfc3986.
 
@@ -18,6 +28,14 @@ class InvalidPath(URLError): pass
 class InvalidQuery(URLError): pass
 
 
+# Validation error flags.
+
+INVALID_SCHEME = 1
+INVALID_USERINFO = 2
+INVALID_HOST = 4
+INVALID_PATH = 8
+INVALID_QUERY = 16
+
 URLTuple = namedtuple('URLBase', 'scheme userinfo host port '
                                  'path query fragment decoded')  # 4, 5, 6, 7
 
@@ -30,6 +48,9 @@ class URL(URLTuple):
     """
     __slots__ = ()
 
+    # InternTable for scheme, host and port, None to disable interning.
+    _intern = None
+
     def __new__(cls, url=None, scheme='', userinfo='', host='', port='',
                 path='', query='', fragment=''):
 
@@ -57,8 +78,101 @@ class URL(URLTuple):
         # | should use lowercase for registered names and hexadecimal
         # | addresses for the sake of uniformity.
 
-        return tuple.__new__(cls, (scheme.lower(), userinfo, host.lower(),
-                                   str(port), path, query, fragment, decoded))
+        scheme, host, port = scheme.lower(), host.lower(), str(port)
+
+        # Share equal strings between urls if interning is enabled.
+        intern = cls._intern
+        if intern is not None:
+            scheme, host, port = intern(scheme), intern(host), intern(port)
+
+        return tuple.__new__(cls, (scheme, userinfo, host, port,
+                                   path, query, fragment, decoded))
+
+    @classmethod
+    def from_bytes(cls, url, encoding='utf-8', errors='replace'):
+        """Parse url from bytes or other buffer, like memoryview.
+        This is a convenience: whole buffer is decoded, without copying
+        to bytes first, and then parsed as a string, which is faster
+        than decoding every component separately. SpanURL is the
+        bytes-native path: it splits the buffer as is and decodes only
+        accessed components.
+        """
+        return cls._create_and_fix(*split_url(
+            _decode_buffer(url, encoding, errors)))
+
+    @classmethod
+    def build(cls, scheme='', userinfo='', host='', port='', path='',
+              query='', fragment='', encoding='utf-8'):
+        """Construct url from not encoded parts. All chars which are not
+        allowed in each part are percent-encoded. Internationalized host
+        is converted to punycode when it is possible, ip literals in
+        brackets are kept as is. Query can be a string, mapping or iterable
+        of pairs.
+        """
+        if not isinstance(host, _text_type):
+            host = host.decode(encoding)
+        if not (host[:1] == '[' and host[-1:] == ']'):
+            try:
+                ascii_host = host_to_ascii(host)
+            except UnicodeError:
+                ascii_host = None
+            # Punycode is used only if it has no chars to encode.
+            if ascii_host is not None and \
+                    encode_url_component(ascii_host, 'host') is ascii_host:
+                host = ascii_host.lower()
+            else:
+                host = encode_url_component(host.lower(), 'host', encoding)
+
+        if isinstance(query, (str, type(u''))):
+            query = encode_url_component(query, 'query', encoding)
+        else:
+            query = encode_query(query, encoding)
+
+        url = cls._create_and_fix(
+            scheme, encode_url_component(userinfo, 'userinfo', encoding),
+            host, port, encode_url_component(path, 'path', encoding), query,
+            encode_url_component(fragment, 'fragment', encoding))
+        if '%' in host:
+            # Keep uppercase hex digits, host is already lowercased.
+            url = url._with_host(host)
+        return url
+
+    @classmethod
+    def parse_many(cls, urls):
+        """Parse every url from iterable. Returns generator.
+        Result is same as calling URL(url) for each, but per-url overhead
+        is much lower.
+        """
+        if (cls._intern is not None or
+                cls._create_and_fix.__func__ is not
+                URL._create_and_fix.__func__):
+            # Subclass has own fixes or interning, respect them.
+            create = cls._create_and_fix
+            for parts in split_urls(urls):
+                yield create(*parts)
+            return
+
+        # Inlined versions of split_url() and _create_and_fix().
+        new = tuple.__new__
+        split = _split_re
+        for url in urls:
+            scheme, userinfo, host, port, path, query, fragment = \
+                split(url).groups('')
+
+            if ':' in host:
+                port_idx = host.rfind(':')
+                port = host[port_idx + 1:]
+                if not port or port.isdigit():
+                    host = host[:port_idx]
+                else:
+                    port = ''
+
+            if path and path[0] != '/':
+                if userinfo or host or port:
+                    path = '/' + path
+
+            yield new(cls, (scheme.lower(), userinfo, host.lower(), port,
+                            path, query, fragment, False))
 
     def decode(self, encoding='utf-8', errors='replace'):
         if self[7]:
@@ -96,6 +210,9 @@ class URL(URLTuple):
 
     as_string = __unicode__
 
+    def to_bytes(self, encoding='utf-8'):
+        return self.as_string().encode(encoding)
+
     def __reduce__(self):
         return _restore, (type(self), tuple(self))
 
@@ -144,6 +261,112 @@ class URL(URLTuple):
 
         return path
 
+    ### Canonicalization
+
+    # Ports which can be omitted for given schemes.
+    default_ports = {'http': '80', 'https': '443', 'ws': '80', 'wss': '443',
+                     'ftp': '21'}
+    # Schemes for which empty path is the same as '/'.
+    root_path_schemes = frozenset(['http', 'https', 'ws', 'wss'])
+
+    def canonical(self, idna=False):
+        """
+        Returns url normalized according rfc3986 section 6.2.2: lowercase
+        scheme and host, normalized percent-encodings, path without dot
+        segments, and section 6.2.3: without default port and with '/'
+        instead of empty path. Dot segments are kept in relative path
+        without scheme and authority. If idna is true, internationalized
+        host is converted to ascii form.
+        """
+        scheme, userinfo, host, port, path, query, fragment = self[0:7]
+
+        if idna:
+            host = self.to_ascii_host()[2]
+
+        if port and self.default_ports.get(scheme) == port:
+            port = ''
+        if not path and scheme in self.root_path_schemes:
+            if userinfo or host or port:
+                path = '/'
+
+        path = normalize_percent_encoding(path)
+        # Dot segments of relative reference are resolved against base,
+        # they can't be removed without it.
+        if scheme or path[:1] == '/' or userinfo or host or port:
+            path = remove_dot_segments(path)
+
+        if '%' in host:
+            # Decoded letters are lowercased, then hex digits of remaining
+            # percent-encodings are uppercased again.
+            host = normalize_percent_encoding(
+                normalize_percent_encoding(host).lower())
+
+        url = self._create_and_fix(
+            scheme, normalize_percent_encoding(userinfo), host, port, path,
+            normalize_percent_encoding(query),
+            normalize_percent_encoding(fragment), self[7])
+        if '%' in host:
+            url = url._with_host(host)
+        if url == self:
+            return self
+        return url
+
+    def to_ascii_host(self):
+        """Returns url with internationalized host converted to ascii
+        form with punycode labels. Raises InvalidHost if host can't be
+        converted.
+        """
+        try:
+            host = host_to_ascii(self[2])
+        except UnicodeError:
+            raise InvalidHost()
+        if host == self[2]:
+            return self
+        return self._create_and_fix(self[0], self[1], host, *self[3:8])
+
+    def to_unicode_host(self):
+        """Returns url with punycode labels of host converted to unicode."""
+        host = host_to_unicode(self[2])
+        if host == self[2]:
+            return self
+        return self._create_and_fix(self[0], self[1], host, *self[3:8])
+
+    _canonical_cache = LRUCache(1000)
+
+    @property
+    def canonical_key(self):
+        """String form of canonical url. Can be used as dedupe key.
+        Recently used keys are cached.
+        """
+        # Subclasses can have other default ports, so type is part of key.
+        cache = self._canonical_cache
+        cache_key = (type(self), self)
+        key = cache.get(cache_key)
+        if key is None:
+            key = cache[cache_key] = self.canonical().as_string()
+        return key
+
+    ### Query
+
+    @property
+    def query_params(self):
+        return parse_query(self[5])
+
+    def _with_host(self, host):
+        return tuple.__new__(type(self), self[0:2] + (host,) + self[3:8])
+
+    def _with_query(self, query):
+        return tuple.__new__(type(self), self[0:5] + (query,) + self[6:8])
+
+    def with_param(self, key, value):
+        return self._with_query(update_query(self[5], ((key, value),)))
+
+    def without_param(self, *keys):
+        return self._with_query(remove_query_params(self[5], keys))
+
+    def update_params(self, params):
+        return self._with_query(update_query(self[5], params))
+
     ### Information
 
     @property
@@ -168,22 +391,41 @@ class URL(URLTuple):
                                 if self[4]
                                 else not self.has_authority())
 
-    def is_host_ipv4(self):
-        if self[2][:1] != '[':
-            parts = self[2].split('.')
-            if len(parts) == 4 and all(part.isdigit() for part in parts):
-                if all(int(part, 10) < 256 for part in parts):
-                    return True
-        return False
+    @property
+    def host_kind(self):
+        """One of HOST_* constants: HOST_EMPTY, HOST_NAME, HOST_IPV4,
+        HOST_IPV6, HOST_IPVFUTURE or HOST_INVALID for host in brackets
+        which is not valid ip literal.
+        """
+        return classify_host(self[2])[0]
 
-    def is_host_ip(self):
-        if self.is_host_ipv4():
-            return True
+    @property
+    def ip_address(self):
+        """Packed ipv4 or ipv6 address of host or None."""
+        return classify_host(self[2])[1]
+
+    @property
+    def public_suffix(self):
+        """Public suffix of host, like 'co.uk' for 'www.example.co.uk'.
+        List can be replaced with yurl.psl.set_default_list().
+        """
+        from .psl import public_suffix
+        return public_suffix(self[2])
+
+    @property
+    def registrable_domain(self):
+        """Public suffix with one more label of host, like 'example.co.uk'
+        for 'www.example.co.uk'. Empty for ip and public suffix hosts.
+        """
+        from .psl import registrable_domain
+        return registrable_domain(self[2])
 
-        if self[2][:1] == '[' and self[2][-1:] == ']':
-            return True
+    def is_host_ipv4(self):
+        return classify_host(self[2])[0] == HOST_IPV4
 
-        return False
+    def is_host_ip(self):
+        # Any host in brackets is ip literal, even not valid one.
+        return classify_host(self[2])[0] not in (HOST_NAME, HOST_EMPTY)
 
     ### Validation
 
@@ -191,46 +433,83 @@ class URL(URLTuple):
     # '[' and ']' the only chars not allowed in userinfo and not delimiters
     _valid_userinfo_re = re.compile(r'^[^/?\#@\[\]]+$').match
     _valid_reg_name_re = re.compile(r'^[^/?\#@\[\]:]+$').match
-    # This primitive regular expression not match complicated ip literal.
-    _valid_ip_literal_re = re.compile(r'''
-        ^(?:
-            v[a-f0-9]+\.[a-z0-9\-._~!$&'()*,;=:]+
-            |
-            [a-f0-9:\.]+
-        )$
-        ''', re.VERBOSE | re.IGNORECASE).match
-
-    def validate(self):
-        if self[0]:
-            if not self._valid_scheme_re(self[0]):
-                raise InvalidScheme()
+    # All validated parts joined with '\0' are checked with one regexp.
+    # Parts with '\0' never match and are checked one by one,
+    # as well as ip literals.
+    _valid_parts_re = re.compile(r'''
+        (?:[a-z][a-z0-9+\-.]*)?  \0  # scheme
+        [^/?\#@\[\]\0]*           \0  # userinfo
+        [^/?\#@\[\]:\0]*          \0  # host
+        [^?\#\0]*                \0  # path
+        [^\#\0]*\Z                   # query
+        ''', re.VERBOSE).match
+
+    def validation_errors(self):
+        """Returns bitmask of INVALID_* flags for all invalid parts."""
+        scheme, userinfo, host = self[0], self[1], self[2]
+        # Joined check pays off only when host and scheme or userinfo are
+        # present, empty parts are skipped for free below.
+        if host and (scheme or userinfo) and host[:1] != '[':
+            if self._valid_parts_re('\0'.join((scheme, userinfo, host,
+                                               self[4], self[5]))):
+                return 0
+
+        errors = 0
+        if scheme:
+            if not self._valid_scheme_re(scheme):
+                errors |= INVALID_SCHEME
 
-        if self[1]:
-            if not self._valid_userinfo_re(self[1]):
-                raise InvalidUserinfo()
+        if userinfo:
+            if not self._valid_userinfo_re(userinfo):
+                errors |= INVALID_USERINFO
 
-        host = self[2]
         if host:
             if host[:1] == '[' and host[-1:] == ']':
-                if not self._valid_ip_literal_re(host[1:-1]):
-                    raise InvalidHost()
+                if classify_host(host)[0] == HOST_INVALID:
+                    errors |= INVALID_HOST
 
             # valid ipv4 is also valid reg_name
             elif not self._valid_reg_name_re(host):
-                raise InvalidHost()
+                errors |= INVALID_HOST
 
         # Acording rfc there is two cases when path can be invalid:
         # There should be no scheme and authority and first segment of path
         # should contain ':' or starts with '//'. But this library not about
         # punish user. We can escape this paths when formatting string.
         if '?' in self[4] or '#' in self[4]:
-            raise InvalidPath()
+            errors |= INVALID_PATH
 
         if '#' in self[5]:
-            raise InvalidQuery()
+            errors |= INVALID_QUERY
 
+        return errors
+
+    def is_valid(self):
+        return not self.validation_errors()
+
+    def validate(self):
+        errors = self.validation_errors()
+        if errors:
+            # Raise for first invalid part.
+            if errors & INVALID_SCHEME:
+                raise InvalidScheme()
+            if errors & INVALID_USERINFO:
+                raise InvalidUserinfo()
+            if errors & INVALID_HOST:
+                raise InvalidHost()
+            if errors & INVALID_PATH:
+                raise InvalidPath()
+            raise InvalidQuery()
         return self
 
+    @classmethod
+    def validate_many(cls, urls):
+        """Returns generator of validation_errors() for every url
+        from iterable. Strings are parsed first.
+        """
+        for url in urls:
+            yield _as_url(url, cls).validation_errors()
+
     ### Manipulation
 
     def __add__(self, other):
@@ -244,7 +523,7 @@ class URL(URLTuple):
         # Same bug also present in urllib.parse.urljoin.
         # I hope it will be fixed in future yurls.
 
-        if not isinstance(other, URLTuple):
+        if not isinstance(other, (URLTuple, LazyURL, SpanURL)):
             raise NotImplementedError()
 
         scheme, userinfo, host, port, path, query, fragment = other._data
@@ -261,14 +540,26 @@ class URL(URLTuple):
                     if not query:
                         query = self[5]
 
-                else:
-                    if path[0] != '/':
-                        parts = self[4].rpartition('/')
-                        path = parts[0] + parts[1] + path
+                elif path[0] != '/':
+                    parts = self[4].rpartition('/')
+                    path = join_dot_segments(parts[0] + parts[1], path)
+                    return self._create_and_fix(scheme, userinfo, host, port,
+                                                path, query, fragment)
 
         return self._create_and_fix(scheme, userinfo, host, port,
                                     remove_dot_segments(path), query, fragment)
 
+    def resolver(self):
+        """Returns URLResolver bound to this url."""
+        return URLResolver(self)
+
+    def relative_to(self, base):
+        """Returns shortest reference which gives this url when joined
+        with base: base + url.relative_to(base) == url.
+        Base can be a string or url object.
+        """
+        return URLResolver(_as_url(base, type(self))).relative(self)
+
     def replace(self, scheme=None, userinfo=None, host=None, port=None,
                 path=None, query=None, fragment=None,
                 authority=None, full_path=None):
@@ -320,24 +611,413 @@ class URL(URLTuple):
     del sys
 
 
+class LazyURL(object):
+    """
+    Keeps url string as is and parses it only on first access to any
+    url component. Parsed url is cached. Behaves like URL, but manipulation
+    methods return ordinary URL objects. Since LazyURL can not be changed,
+    as_string() always returns original string.
+    """
+    __slots__ = ('_string', '_url')
+
+    def __init__(self, url):
+        self._string = url
+        self._url = None
+
+    @property
+    def url(self):
+        url = self._url
+        if url is None:
+            url = self._url = URL(self._string)
+        return url
+
+    def __getattr__(self, name):
+        # Everything not defined here is taken from parsed url.
+        return getattr(self.url, name)
+
+    def __unicode__(self):
+        return self._string
+
+    as_string = __unicode__
+
+    def __repr__(self):
+        return 'LazyURL({0!r})'.format(self._string)
+
+    def __reduce__(self):
+        return LazyURL, (self._string,)
+
+    def __getitem__(self, idx):
+        return self.url[idx]
+
+    def __len__(self):
+        return len(URLTuple._fields)
+
+    def __iter__(self):
+        return iter(self.url)
+
+    def __eq__(self, other):
+        return self.url == other
+
+    def __ne__(self, other):
+        return self.url != other
+
+    def __hash__(self):
+        return hash(self.url)
+
+    def __nonzero__(self):
+        return bool(self.url)
+
+    def __add__(self, other):
+        return self.url + other
+
+    def validate(self):
+        self.url.validate()
+        return self
+
+    ### Python 2 to 3 compatibility
+
+    import sys
+    if sys.version_info > (3, 0):
+        __str__ = __unicode__
+        del __unicode__
+        __bool__ = __nonzero__
+        del __nonzero__
+    else:
+        __str__ = lambda self: self.__unicode__().encode('utf-8')
+    del sys
+
+
+class URLResolver(object):
+    """
+    Resolves many references against the same base url. Result is the same
+    as for base + URL(reference), but parts of the base which are needed
+    for every join are computed only once.
+    """
+    __slots__ = ('base', '_authority', '_directory', '_join', '_create',
+                 '_segments')
+
+    def __init__(self, base):
+        self.base = base
+        # Segments of directory for relative(), computed on first use.
+        self._segments = None
+        self._authority = base[1:4]
+        parts = base[4].rpartition('/')
+        self._directory = parts[0] + parts[1]
+        # Only references need to be normalized if directory is clean.
+        if _has_dot_segments(self._directory):
+            self._join = join_dot_segments
+        else:
+            self._join = _join_dot_segments
+        self._create = base._create_and_fix
+
+    def resolve(self, reference):
+        """Reference can be a string or url object."""
+        if isinstance(reference, tuple):
+            reference = reference[0:7]
+        elif isinstance(reference, (LazyURL, SpanURL)):
+            reference = reference._data
+        else:
+            reference = split_url(reference)
+        scheme, userinfo, host, port, path, query, fragment = reference
+
+        # Same logic as in URL.__add__().
+        if not scheme:
+            base = self.base
+            scheme = base[0]
+
+            if not (host or userinfo or port):
+                userinfo, host, port = self._authority
+
+                if not path:
+                    path = base[4]
+
+                    if not query:
+                        query = base[5]
+
+                elif path[0] != '/':
+                    return self._create(scheme, userinfo, host, port,
+                                        self._join(self._directory, path),
+                                        query, fragment)
+
+        return self._create(scheme, userinfo, host, port,
+                            remove_dot_segments(path), query, fragment)
+
+    def resolve_many(self, references):
+        """Resolve every reference from iterable. Returns generator."""
+        resolve = self.resolve
+        for reference in references:
+            yield resolve(reference)
+
+    ### Inverse of resolve
+
+    def _relative_path(self, path):
+        segments = self._segments
+        if segments is None:
+            segments = self._directory.split('/')[:-1]
+            # Empty path of base with authority is merged as '/'.
+            if not segments and any(self._authority):
+                segments = ['']
+            self._segments = segments
+
+        target = path.split('/')
+        common = 0
+        limit = min(len(segments), len(target) - 1)
+        while common < limit and segments[common] == target[common]:
+            common += 1
+        if common == 0 and segments:
+            return None
+
+        path = '../' * (len(segments) - common) + '/'.join(target[common:])
+        if not path:
+            return './'
+        if path[0] == '/':
+            # Empty first segment would make path absolute.
+            return './' + path
+        return path
+
+    def _references(self, target):
+        # Candidate references from shortest to longest.
+        scheme, userinfo, host, port, path, query, fragment, decoded = \
+            target[0:8]
+        base = self.base
+        if scheme != base[0]:
+            return
+
+        new, cls = tuple.__new__, type(target)
+        if (userinfo, host, port) == self._authority:
+            if path == base[4]:
+                if query == base[5]:
+                    yield new(cls, ('', '', '', '', '', '', fragment,
+                                    decoded))
+                elif query:
+                    yield new(cls, ('', '', '', '', '', query, fragment,
+                                    decoded))
+
+            paths = []
+            relative = self._relative_path(path)
+            if relative is not None:
+                paths.append(relative)
+            # Path starting with '//' would be parsed as authority.
+            if path[:1] == '/' and path[:2] != '//':
+                paths.append(path)
+            candidates = [new(cls, ('', '', '', '', value, query,
+                                    fragment, decoded))
+                          for value in paths]
+            candidates.append(new(cls, ('', userinfo, host, port, path,
+                                        query, fragment, decoded)))
+            # Network-path reference can be shorter than relative path.
+            for reference in sorted(candidates,
+                                    key=lambda url: len(url.as_string())):
+                yield reference
+            return
+
+        yield new(cls, ('', userinfo, host, port, path, query, fragment,
+                        decoded))
+
+    def relative(self, target):
+        """Returns shortest reference which gives target when resolved
+        against base. If there is no such reference, target itself is
+        returned. Target can be a string or url object.
+        """
+        target = _as_url(target, type(self.base))
+        for reference in self._references(target):
+            if self.resolve(reference)[0:7] == target[0:7]:
+                return reference
+        return target
+
+    def relative_many(self, targets):
+        """Returns generator of relative() for every target from iterable.
+        """
+        relative = self.relative
+        for target in targets:
+            yield relative(target)
+
+
+def _span_property(idx, lower=False):
+    def component(self):
+        spans = self._spans
+        value = self._source[spans[idx * 2]:spans[idx * 2 + 1]]
+        if not isinstance(value, _text_type):
+            value = _decode_buffer(value, self._encoding, self._errors)
+        return value.lower() if lower else value
+    return property(component)
+
+
+class SpanURL(object):
+    """
+    Keeps reference to source string and positions of url components
+    in it. Strings of components are created only on access, as_string()
+    returns source string without copying. Manipulation methods return
+    ordinary URL objects.
+
+    Source can also be bytes or other buffer, like memoryview. Components
+    are decoded only on access, to_bytes() returns source without decoding.
+    """
+    __slots__ = ('_source', '_spans')
+
+    # Encoding of bytes sources.
+    _encoding = 'utf-8'
+    _errors = 'replace'
+
+    def __init__(self, url):
+        self._source = url
+        spans = split_url_spans(url)
+        self._spans = array('H' if len(url) < 0x10000 else 'L', spans)
+
+    scheme = _span_property(0, lower=True)
+    userinfo = _span_property(1)
+    host = _span_property(2, lower=True)
+    port = _span_property(3)
+    path = _span_property(4)
+    query = _span_property(5)
+    fragment = _span_property(6)
+    decoded = False
+
+    @property
+    def _data(self):
+        source, spans = self._source, self._spans
+        if not isinstance(source, _text_type):
+            return tuple(getattr(self, name) for name in URLTuple._fields[:7])
+        return (source[spans[0]:spans[1]].lower(),
+                source[spans[2]:spans[3]],
+                source[spans[4]:spans[5]].lower(),
+                source[spans[6]:spans[7]],
+                source[spans[8]:spans[9]],
+                source[spans[10]:spans[11]],
+                source[spans[12]:spans[13]])
+
+    def to_url(self, cls=URL):
+        return tuple.__new__(cls, self._data + (False,))
+
+    def __getattr__(self, name):
+        # Everything not defined here is taken from url object.
+        return getattr(self.to_url(), name)
+
+    def __unicode__(self):
+        source = self._source
+        if not isinstance(source, _text_type):
+            return _decode_buffer(source, self._encoding, self._errors)
+        return source
+
+    as_string = __unicode__
+
+    def to_bytes(self, encoding='utf-8'):
+        """Bytes sources are returned as is, without decoding."""
+        if isinstance(self._source, _text_type):
+            return self._source.encode(encoding)
+        return _to_bytes(self._source)
+
+    def __repr__(self):
+        return 'SpanURL({0!r})'.format(self._source)
+
+    def __reduce__(self):
+        # Memoryview can't be pickled.
+        source = self._source
+        if isinstance(source, memoryview):
+            source = source.tobytes()
+        return type(self), (source,)
+
+    def __getitem__(self, idx):
+        return (self._data + (False,))[idx]
+
+    def __len__(self):
+        return len(URLTuple._fields)
+
+    def __iter__(self):
+        return iter(self._data + (False,))
+
+    def __eq__(self, other):
+        return self.to_url() == other
+
+    def __ne__(self, other):
+        return self.to_url() != other
+
+    def __hash__(self):
+        return hash(self.to_url())
+
+    def __nonzero__(self):
+        return any(self._data)
+
+    def __add__(self, other):
+        return self.to_url() + other
+
+    def validate(self):
+        self.to_url().validate()
+        return self
+
+    ### Python 2 to 3 compatibility
+
+    import sys
+    if sys.version_info > (3, 0):
+        __str__ = __unicode__
+        del __unicode__
+        __bool__ = __nonzero__
+        del __nonzero__
+    else:
+        __str__ = lambda self: self.__unicode__().encode('utf-8')
+    del sys
+
+
+def _as_url(value, cls=URL):
+    # Url objects of any kind are accepted where strings are.
+    if isinstance(value, tuple):
+        return value
+    if isinstance(value, LazyURL):
+        return value.url
+    if isinstance(value, SpanURL):
+        return value.to_url(cls)
+    return cls(value)
+
+
 class CachedURL(URL):
+    """
+    URL which keeps recently parsed strings in LRU cache.
+    Subclasses can have own cache with different size:
+
+        class MyCachedURL(CachedURL):
+            _cache = LRUCache(1000)
+
+    or set _cache_size, then cache of that size is created on first use.
+    """
     __slots__ = ()
-    _cache = {}
     _cache_size = 20
+    _cache = LRUCache(_cache_size)
 
     def __new__(cls, url=None, *args, **kwargs):
         # Cache only when parsing.
         if url is None:
             return URL.__new__(cls, None, *args, **kwargs)
 
-        self = cls._cache.get(url)
+        cache = cls._cache
+        if cache.maxsize != cls._cache_size:
+            cache = cls._sync_cache()
 
-        if self is None:
-            if len(cls._cache) >= cls._cache_size:
-                cls._cache.clear()
+        self = cache.get(url)
 
+        if self is None:
             # Construct and store.
             self = URL.__new__(cls, url)
-            cls._cache[url] = self
+            cache[url] = self
 
         return self
+
+    @classmethod
+    def _sync_cache(cls):
+        # Whichever of _cache and _cache_size is set closer to cls wins.
+        mro = cls.__mro__
+        size_owner = next(klass for klass in mro
+                          if '_cache_size' in vars(klass))
+        cache_owner = next(klass for klass in mro if '_cache' in vars(klass))
+        if mro.index(size_owner) <= mro.index(cache_owner):
+            size_owner._cache = LRUCache(size_owner._cache_size)
+        else:
+            cache_owner._cache_size = cache_owner._cache.maxsize
+        return cls._cache
+
+    @classmethod
+    def cache_info(cls):
+        return cls._cache.info()
+
+    @classmethod
+    def cache_clear(cls):
+        cls._cache.clear()
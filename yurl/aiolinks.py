@@ -0,0 +1,25 @@
+"""Asyncio version of yurl.links. Requires python 3.6+."""
+
+from .links import LinkExtractor
+
+
+async def extract_links(stream, base, chunk_size=1 << 16, **kwargs):
+    """Async generator of links from html stream. Stream is either object
+    with read() coroutine, like asyncio.StreamReader, or async iterable
+    of chunks. Arguments are the same as for links.LinkExtractor.
+    """
+    extractor = LinkExtractor(base, **kwargs)
+    if hasattr(stream, 'read'):
+        while True:
+            chunk = await stream.read(chunk_size)
+            if not chunk:
+                break
+            for url in extractor.feed(chunk):
+                yield url
+    else:
+        async for chunk in stream:
+            for url in extractor.feed(chunk):
+                yield url
+
+    for url in extractor.close():
+        yield url
@@ -0,0 +1,218 @@
+"""
+Benchmarks of url operations on generated corpora.
+
+Every suite is run on every corpus it applies to. Each run is repeated
+several times after warmup and statistics of timings are reported.
+Results can be saved as json and compared with previous run:
+
+    python -m yurl.bench run --json before.json
+    python -m yurl.bench run --json after.json
+    python -m yurl.bench compare before.json after.json
+"""
+
+from __future__ import print_function, division
+import json
+import math
+import platform
+import sys
+from timeit import default_timer
+
+from .. import URL
+from . import corpora
+
+
+FORMAT_VERSION = 1
+
+### Suites
+#
+# Suite prepares data from list of url strings and returns function
+# which processes all of them once.
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+
+def _parse(urls):
+    def run():
+        for url in urls:
+            URL(url)
+    return run
+
+
+def _urlsplit(urls):
+    def run():
+        for url in urls:
+            urlsplit(url)
+    return run
+
+
+def _serialize(urls):
+    urls = [URL(url) for url in urls]
+
+    def run():
+        for url in urls:
+            url.as_string()
+    return run
+
+
+def _join(urls):
+    base = URL('http://example.com/a/b/c/d;p?q')
+
+    def run():
+        for url in urls:
+            base + URL(url)
+    return run
+
+
+def _replace(urls):
+    urls = [URL(url) for url in urls]
+
+    def run():
+        for url in urls:
+            url.replace(host='example.org', fragment='top')
+    return run
+
+
+def _validate(urls):
+    urls = [URL(url) for url in urls]
+
+    def run():
+        for url in urls:
+            url.is_valid()
+    return run
+
+
+def _decode(urls):
+    urls = [URL(url) for url in urls]
+
+    def run():
+        for url in urls:
+            url.decode()
+    return run
+
+
+# name: (suite, corpora names)
+_absolute = ('crawl', 'api', 'long_query', 'data_uri')
+suites = {
+    'parse': (_parse, _absolute + ('relative',)),
+    'urlsplit': (_urlsplit, _absolute + ('relative',)),
+    'serialize': (_serialize, _absolute),
+    'join': (_join, ('relative',)),
+    'replace': (_replace, _absolute),
+    'validate': (_validate, _absolute),
+    'decode': (_decode, _absolute),
+}
+
+### Statistics
+
+
+def stats(timings, count):
+    """Statistics of list of timings for count urls each.
+    All values are nanoseconds per url.
+    """
+    timings = sorted(timing / count * 1e9 for timing in timings)
+    size = len(timings)
+    mean = sum(timings) / size
+    middle = size // 2
+    if size % 2:
+        median = timings[middle]
+    else:
+        median = (timings[middle - 1] + timings[middle]) / 2
+    if size > 1:
+        stdev = math.sqrt(sum((timing - mean) ** 2 for timing in timings) /
+                          (size - 1))
+    else:
+        stdev = 0.0
+    return {'min': timings[0], 'max': timings[-1], 'mean': mean,
+            'median': median, 'stdev': stdev, 'repeat': size,
+            'count': count}
+
+### Running
+
+
+def run_one(suite, urls, repeat=7, warmup=2):
+    """Runs suite on urls repeat times after warmup runs.
+    Returns statistics.
+    """
+    func = suite(urls)
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = default_timer()
+        func()
+        timings.append(default_timer() - start)
+    return stats(timings, len(urls))
+
+
+def run(suite_names=None, corpus_names=None, size=2000, repeat=7, warmup=2,
+        seed=1, report=None):
+    """Runs selected suites on selected corpora. Returns json-serializable
+    dict with environment and results keyed by 'suite/corpus'.
+    If report is given, it is called with the name and statistics
+    after every benchmark.
+    """
+    results = {}
+    data = {}
+    for suite_name in sorted(suite_names or suites):
+        suite, applies_to = suites[suite_name]
+        for corpus_name in applies_to:
+            if corpus_names and corpus_name not in corpus_names:
+                continue
+            if corpus_name not in data:
+                data[corpus_name] = corpora.generate(corpus_name, size, seed)
+            name = '{0}/{1}'.format(suite_name, corpus_name)
+            results[name] = run_one(suite, data[corpus_name], repeat, warmup)
+            if report is not None:
+                report(name, results[name])
+
+    return {
+        'format': FORMAT_VERSION,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'size': size,
+        'seed': seed,
+        'results': results,
+    }
+
+### Comparison
+
+
+def compare(old, new, threshold=0.1):
+    """Compares medians of two runs. Returns list of
+    (name, old median, new median, ratio, status) for benchmarks present
+    in both runs. Status is 'regression' if new run is slower more than
+    by threshold, 'improvement' if it is faster, '' otherwise.
+    """
+    rows = []
+    old, new = old['results'], new['results']
+    for name in sorted(set(old) & set(new)):
+        before, after = old[name]['median'], new[name]['median']
+        ratio = after / before if before else float('inf')
+        # Noise of both runs is not a regression.
+        noise = max(old[name]['stdev'], new[name]['stdev'])
+        status = ''
+        if ratio > 1 + threshold and after - before > noise:
+            status = 'regression'
+        elif ratio < 1 - threshold and before - after > noise:
+            status = 'improvement'
+        rows.append((name, before, after, ratio, status))
+    return rows
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def dump(result, path):
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+
+
+def print_row(name, stat, file=sys.stdout):
+    print('{0:24} {1:10.1f} {2:10.1f} {3:8.1f}'.format(
+        name, stat['median'], stat['min'], stat['stdev']), file=file)
@@ -0,0 +1,63 @@
+from __future__ import print_function
+import argparse
+import sys
+
+from . import suites, corpora, run, compare, load, dump, print_row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m yurl.bench',
+                                     description='Benchmarks of yurl.')
+    commands = parser.add_subparsers(dest='command')
+
+    run_parser = commands.add_parser('run', help='run benchmarks')
+    run_parser.add_argument('--suite', action='append',
+                            choices=sorted(suites),
+                            help='suite to run, all by default')
+    run_parser.add_argument('--corpus', action='append',
+                            choices=sorted(corpora.corpora),
+                            help='corpus to use, all by default')
+    run_parser.add_argument('--size', type=int, default=2000,
+                            help='number of urls in every corpus')
+    run_parser.add_argument('--repeat', type=int, default=7)
+    run_parser.add_argument('--warmup', type=int, default=2)
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--json', help='save results to file')
+
+    compare_parser = commands.add_parser(
+        'compare', help='compare two saved runs')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='relative slowdown treated as '
+                                     'regression, 0.1 by default')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        print('{0:24} {1:>10} {2:>10} {3:>8}'.format(
+            'ns per url', 'median', 'min', 'stdev'))
+        result = run(args.suite, args.corpus, args.size, args.repeat,
+                     args.warmup, args.seed, report=print_row)
+        if args.json:
+            dump(result, args.json)
+        return 0
+
+    if args.command == 'compare':
+        rows = compare(load(args.old), load(args.new), args.threshold)
+        print('{0:24} {1:>10} {2:>10} {3:>7}'.format(
+            'ns per url', 'old', 'new', 'ratio'))
+        for name, before, after, ratio, status in rows:
+            print('{0:24} {1:10.1f} {2:10.1f} {3:7.2f} {4}'.format(
+                name, before, after, ratio, status))
+        # Non-zero exit status, so regressions can fail the build.
+        if any(row[4] == 'regression' for row in rows):
+            return 1
+        return 0
+
+    parser.print_help()
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Generated url corpora. Generation is seeded, so every run of
+benchmarks gets the same urls.
+"""
+
+import random
+
+
+_words = ['news', 'blog', 'article', 'user', 'profile', 'search', 'catalog',
+          'item', 'images', 'static', 'assets', 'docs', 'api', 'page',
+          'category', 'tag', 'archive', 'download', 'help', 'about']
+_tlds = ['com', 'org', 'net', 'ru', 'de', 'io', 'co.uk']
+_params = ['q', 'page', 'sort', 'lang', 'ref', 'utm_source', 'utm_medium',
+           'utm_campaign', 'id', 'session', 'filter', 'limit', 'offset']
+
+
+def _host(rnd):
+    # Few popular hosts and long tail of rare ones.
+    idx = int(rnd.paretovariate(1.2)) % 500
+    prefix = rnd.choice(['www.', '', 'm.', 'cdn.'])
+    return '{0}site{1}.{2}'.format(prefix, idx, _tlds[idx % len(_tlds)])
+
+
+def _path(rnd, depth):
+    return '/' + '/'.join(rnd.choice(_words) if rnd.random() < 0.7
+                          else str(rnd.randint(1, 100000))
+                          for _ in range(depth))
+
+
+def _query(rnd, count):
+    return '&'.join('{0}={1}'.format(rnd.choice(_params),
+                                     rnd.choice(_words + ['%D0%BF', 'a+b',
+                                                          str(rnd.random())]))
+                    for _ in range(count))
+
+
+def crawl(size, rnd):
+    """Urls found on web pages: various hosts, paths, some queries
+    and fragments.
+    """
+    urls = []
+    for _ in range(size):
+        url = '{0}://{1}{2}'.format(rnd.choice(['http', 'https']),
+                                    _host(rnd),
+                                    _path(rnd, rnd.randint(0, 5)))
+        if rnd.random() < 0.1:
+            url += '.html'
+        if rnd.random() < 0.3:
+            url += '?' + _query(rnd, rnd.randint(1, 3))
+        if rnd.random() < 0.05:
+            url += '#' + rnd.choice(_words)
+        urls.append(url)
+    return urls
+
+
+def api(size, rnd):
+    """Requests to REST API: few hosts, versioned paths with ids."""
+    urls = []
+    for _ in range(size):
+        url = 'https://api{0}.example.com:{1}/v{2}/{3}/{4}'.format(
+            rnd.randint(1, 3), rnd.choice([443, 8443]), rnd.randint(1, 3),
+            rnd.choice(_words), rnd.randint(1, 10 ** 9))
+        if rnd.random() < 0.5:
+            url += '/' + rnd.choice(_words)
+        url += '?fields={0}&limit={1}'.format(
+            ','.join(rnd.sample(_words, 3)), rnd.randint(1, 100))
+        urls.append(url)
+    return urls
+
+
+def long_query(size, rnd):
+    """Tracking urls with dozens of query parameters."""
+    return ['https://{0}/track?{1}'.format(_host(rnd),
+                                           _query(rnd, rnd.randint(20, 60)))
+            for _ in range(size)]
+
+
+def data_uri(size, rnd):
+    """Inline images: short scheme and very long path."""
+    alphabet = ('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+                '0123456789+/')
+    return ['data:image/png;base64,' +
+            ''.join(rnd.choice(alphabet)
+                    for _ in range(rnd.randint(200, 2000)))
+            for _ in range(size)]
+
+
+def relative(size, rnd):
+    """References for joining with base url."""
+    refs = []
+    for _ in range(size):
+        kind = rnd.random()
+        if kind < 0.4:
+            ref = _path(rnd, rnd.randint(1, 4))
+        elif kind < 0.7:
+            ref = '../' * rnd.randint(1, 3) + rnd.choice(_words)
+        elif kind < 0.8:
+            ref = '?' + _query(rnd, 2)
+        elif kind < 0.9:
+            ref = '//' + _host(rnd) + _path(rnd, 2)
+        else:
+            ref = rnd.choice(_words) + '/./' + rnd.choice(_words)
+        refs.append(ref)
+    return refs
+
+
+corpora = {
+    'crawl': crawl,
+    'api': api,
+    'long_query': long_query,
+    'data_uri': data_uri,
+    'relative': relative,
+}
+
+
+def generate(name, size, seed=1):
+    return corpora[name](size, random.Random(seed))
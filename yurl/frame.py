@@ -0,0 +1,169 @@
+from array import array
+
+from . import URL, _as_url
+
+
+_scalar_types = (type(''), type(u''), int)
+
+
+class _Dictionary(object):
+    """Distinct values of column and codes for them.
+    Shared between frame and all frames derived from it.
+    """
+    __slots__ = ('values', 'codes')
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class URLFrame(object):
+    """
+    Columnar container for many parsed urls. Every url component is stored
+    in own column. Scheme, host and port columns are dictionary-encoded:
+    each distinct value is stored once and rows keep only integer codes.
+    URL objects are materialized only on access.
+    """
+    encoded_columns = ('scheme', 'host', 'port')
+    plain_columns = ('userinfo', 'path', 'query', 'fragment')
+
+    def __init__(self, urls=(), cls=URL):
+        self.cls = cls
+        self._dicts = dict((name, _Dictionary())
+                           for name in self.encoded_columns)
+        self._codes = dict((name, array('l'))
+                           for name in self.encoded_columns)
+        self._columns = dict((name, []) for name in self.plain_columns)
+        self._decoded = bytearray()
+        self.extend(urls)
+
+    def _empty_copy(self):
+        # Dictionaries are only growing, so they can be shared.
+        frame = type(self).__new__(type(self))
+        frame.cls = self.cls
+        frame._dicts = self._dicts
+        frame._codes = dict((name, array('l'))
+                            for name in self.encoded_columns)
+        frame._columns = dict((name, []) for name in self.plain_columns)
+        frame._decoded = bytearray()
+        return frame
+
+    def extend(self, urls):
+        """Add urls to frame. Strings are parsed, url objects of any kind
+        are used as is.
+        """
+        scheme_codes, host_codes, port_codes = [
+            self._codes[name] for name in self.encoded_columns]
+        scheme_encode, host_encode, port_encode = [
+            self._dicts[name].encode for name in self.encoded_columns]
+        userinfo, path, query, fragment = [
+            self._columns[name].append for name in self.plain_columns]
+        decoded = self._decoded.append
+
+        for url in urls:
+            url = _as_url(url, self.cls)
+            scheme_codes.append(scheme_encode(url[0]))
+            userinfo(url[1])
+            host_codes.append(host_encode(url[2]))
+            port_codes.append(port_encode(url[3]))
+            path(url[4])
+            query(url[5])
+            fragment(url[6])
+            decoded(bool(url[7]))
+
+    def append(self, url):
+        self.extend((url,))
+
+    def __len__(self):
+        return len(self._decoded)
+
+    def __getitem__(self, idx):
+        codes, dicts, columns = self._codes, self._dicts, self._columns
+        return tuple.__new__(self.cls, (
+            dicts['scheme'].values[codes['scheme'][idx]],
+            columns['userinfo'][idx],
+            dicts['host'].values[codes['host'][idx]],
+            dicts['port'].values[codes['port'][idx]],
+            columns['path'][idx],
+            columns['query'][idx],
+            columns['fragment'][idx],
+            bool(self._decoded[idx])))
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def column(self, name):
+        """List of values of given column."""
+        if name in self._codes:
+            values = self._dicts[name].values
+            return [values[code] for code in self._codes[name]]
+        return list(self._columns[name])
+
+    def distinct(self, name):
+        """Distinct values of dictionary-encoded column in order of
+        first appearance.
+        """
+        values = self._dicts[name].values
+        return [values[code] for code in sorted(set(self._codes[name]))]
+
+    def take(self, indices):
+        """New frame with rows of given indices."""
+        frame = self._empty_copy()
+        for name, codes in self._codes.items():
+            frame._codes[name] = array('l', [codes[idx] for idx in indices])
+        for name, column in self._columns.items():
+            frame._columns[name] = [column[idx] for idx in indices]
+        decoded = self._decoded
+        frame._decoded = bytearray([decoded[idx] for idx in indices])
+        return frame
+
+    def filter(self, scheme=None, host=None, port=None):
+        """New frame only with rows with given scheme, host and port.
+        Each argument can be a string or a collection of strings.
+        """
+        indices = None
+        for name, wanted in (('scheme', scheme), ('host', host),
+                             ('port', port)):
+            if wanted is None:
+                continue
+            if isinstance(wanted, _scalar_types):
+                wanted = (wanted,)
+            # Compare integer codes instead of strings.
+            codes = self._dicts[name].codes
+            wanted = set(codes[value] for value in
+                         (str(value) if isinstance(value, int) else value
+                          for value in wanted)
+                         if value in codes)
+            column = self._codes[name]
+            if indices is None:
+                indices = [idx for idx, code in enumerate(column)
+                           if code in wanted]
+            else:
+                indices = [idx for idx in indices if column[idx] in wanted]
+
+        if indices is None:
+            indices = range(len(self))
+        return self.take(indices)
+
+    def group_by(self, name):
+        """Split frame to dict of frames by values of dictionary-encoded
+        column (scheme, host or port).
+        """
+        groups = {}
+        for idx, code in enumerate(self._codes[name]):
+            try:
+                groups[code].append(idx)
+            except KeyError:
+                groups[code] = [idx]
+
+        values = self._dicts[name].values
+        return dict((values[code], self.take(indices))
+                    for code, indices in groups.items())
@@ -0,0 +1,154 @@
+"""
+Opt-in counters of calls and time spent in hot functions of yurl.
+
+Nothing is measured until enable() is called: it replaces hot functions
+in all loaded yurl modules with counting wrappers, disable() puts original
+functions back. Modules imported after enable() are not instrumented.
+
+    from yurl import instrument
+    instrument.enable()
+    ...
+    print(instrument.snapshot())
+"""
+
+import sys
+import threading
+from functools import wraps
+from timeit import default_timer
+
+from . import utils, URL, CachedURL
+
+
+hot_functions = ('split_url', 'decode_url', 'decode_url_component',
+                 'decode_query_component', 'encode_url_component',
+                 'remove_dot_segments', 'join_dot_segments',
+                 '_join_dot_segments', 'normalize_percent_encoding',
+                 'parse_query', 'encode_query', 'classify_host',
+                 'host_to_ascii', 'host_to_unicode')
+
+# name -> [calls, seconds]
+_counters = dict((name, [0, 0.0]) for name in hot_functions)
+# name -> original function
+_originals = {}
+
+
+def _wrap(name, func):
+    counter = _counters[name]
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = default_timer()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            counter[0] += 1
+            counter[1] += default_timer() - start
+    wrapper._instrumented = func
+    return wrapper
+
+
+def _modules():
+    return [module for name, module in list(sys.modules.items())
+            if module is not None and
+            (name == 'yurl' or name.startswith('yurl.'))]
+
+
+def _replace(old, new):
+    # Functions are imported by name to other modules, so every reference
+    # should be replaced.
+    for module in _modules():
+        for name, value in list(vars(module).items()):
+            if value is old:
+                setattr(module, name, new)
+
+
+def enable():
+    """Start counting calls and time of hot functions."""
+    for name in hot_functions:
+        if name in _originals:
+            continue
+        original = getattr(utils, name)
+        _originals[name] = original
+        _replace(original, _wrap(name, original))
+
+
+def disable():
+    """Restore original functions. Counters are kept."""
+    for name, original in list(_originals.items()):
+        _replace(getattr(utils, name), original)
+        del _originals[name]
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+def _caches():
+    caches = {
+        'canonical_key': URL._canonical_cache,
+        'parse_query': utils._query_cache,
+        'classify_host': utils._host_cache,
+        'idna': utils._idna_cache,
+    }
+    # CachedURL and subclasses with own caches.
+    classes = [CachedURL]
+    while classes:
+        cls = classes.pop()
+        classes.extend(cls.__subclasses__())
+        caches.setdefault(cls.__name__, cls._cache)
+    return caches
+
+
+def snapshot():
+    """Returns dict with calls and total seconds for every hot function
+    and hits, misses, evictions and size of every cache.
+    """
+    functions = dict((name, {'calls': calls, 'time': seconds})
+                     for name, (calls, seconds) in _counters.items())
+    caches = dict((name, dict(zip(cache.info()._fields, cache.info())))
+                  for name, cache in _caches().items())
+    return {'functions': functions, 'caches': caches}
+
+
+def reset():
+    """Zero all counters, including cache statistics. Cached data is kept.
+    """
+    for counter in _counters.values():
+        counter[:] = [0, 0.0]
+    for cache in _caches().values():
+        cache.hits = cache.misses = cache.evictions = 0
+
+
+class PeriodicDump(threading.Thread):
+    """Daemon thread which calls callback with snapshot() every interval
+    seconds. If reset is true, counters are reset after every call,
+    so each snapshot covers only last interval.
+    """
+
+    def __init__(self, callback, interval=60.0, reset=False):
+        super(PeriodicDump, self).__init__(name='yurl-instrument')
+        self.daemon = True
+        self.callback = callback
+        self.interval = interval
+        self.reset = reset
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        data = snapshot()
+        if self.reset:
+            reset()
+        self.callback(data)
+
+    def stop(self):
+        self._stopped.set()
+
+
+def dump_every(interval, callback, reset=False):
+    """Start PeriodicDump thread. Returns it, call stop() to finish."""
+    thread = PeriodicDump(callback, interval, reset)
+    thread.start()
+    return thread
@@ -0,0 +1,146 @@
+"""
+Extraction of links from html. Html is consumed incrementally, so pages
+can be processed while they are downloaded. Links are resolved against
+the page url or <base href> and deduplicated.
+
+Asyncio version is in yurl.aiolinks module (python 3.6+).
+"""
+
+import codecs
+
+try:
+    from html.parser import HTMLParser
+except ImportError:
+    from HTMLParser import HTMLParser
+
+from . import URL
+
+
+# Tag and attribute with url in it.
+link_attributes = {
+    'a': 'href',
+    'area': 'href',
+    'link': 'href',
+    'img': 'src',
+    'script': 'src',
+    'iframe': 'src',
+    'frame': 'src',
+    'embed': 'src',
+    'source': 'src',
+    'audio': 'src',
+    'video': 'src',
+    'track': 'src',
+    'form': 'action',
+}
+
+# Browsers strip this chars around urls and remove tabs and newlines inside.
+_strip_chars = ' \t\n\r\f'
+_remove_chars = dict.fromkeys(map(ord, '\t\n\r'))
+
+
+class _LinkParser(HTMLParser):
+    # HTMLParser is old-style class in python 2, super() can't be used.
+    def __init__(self, attributes):
+        try:
+            HTMLParser.__init__(self, convert_charrefs=True)
+        except TypeError:
+            HTMLParser.__init__(self)
+        self.attributes = attributes
+        # Pairs of is_base flag and raw value with decoded entities.
+        self.found = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'base':
+            name = 'href'
+        else:
+            name = self.attributes.get(tag)
+            if name is None:
+                return
+
+        for attr, value in attrs:
+            if attr == name and value is not None:
+                self.found.append((tag == 'base', value))
+
+
+class LinkExtractor(object):
+    """
+    Incremental link extractor for one page. Feed it with chunks of html
+    as bytes or text, every call returns list of new links found.
+    Only first <base href> is used and only for links which follow it.
+    If schemes are given, links with other schemes are skipped.
+    """
+
+    def __init__(self, base, attributes=None, schemes=None, dedupe=True,
+                 encoding='utf-8', errors='replace', cls=URL):
+        if not isinstance(base, tuple):
+            base = cls(base)
+        self.base = base
+        self.schemes = frozenset(schemes) if schemes else None
+        self._resolver = base.resolver()
+        self._base_found = False
+        self._seen = set() if dedupe else None
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors)
+        self._parser = _LinkParser(attributes or link_attributes)
+
+    def feed(self, chunk):
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        self._parser.feed(chunk)
+        return self._collect()
+
+    def close(self):
+        """Process rest of the page. Returns list of last links."""
+        self._parser.feed(self._decoder.decode(b'', True))
+        self._parser.close()
+        return self._collect()
+
+    def _collect(self):
+        found = self._parser.found
+        if not found:
+            return []
+        self._parser.found = []
+
+        resolve = self._resolver.resolve
+        schemes, seen = self.schemes, self._seen
+        links = []
+        for is_base, value in found:
+            value = value.strip(_strip_chars)
+            if '\t' in value or '\n' in value or '\r' in value:
+                value = value.translate(_remove_chars)
+
+            if is_base:
+                if not self._base_found:
+                    self._base_found = True
+                    self.base = resolve(value)
+                    self._resolver = self.base.resolver()
+                    resolve = self._resolver.resolve
+                continue
+
+            # Empty link points to page itself.
+            if not value:
+                continue
+
+            url = resolve(value)
+            if schemes is not None and url[0] not in schemes:
+                continue
+            if seen is not None:
+                if url in seen:
+                    continue
+                seen.add(url)
+            links.append(url)
+        return links
+
+
+def extract_links(chunks, base, **kwargs):
+    """Yields links from html, which can be given as a whole or as
+    iterable of chunks. Arguments are the same as for LinkExtractor.
+    """
+    if isinstance(chunks, (bytes, type(u''))):
+        chunks = (chunks,)
+
+    extractor = LinkExtractor(base, **kwargs)
+    for chunk in chunks:
+        for url in extractor.feed(chunk):
+            yield url
+    for url in extractor.close():
+        yield url
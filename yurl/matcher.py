@@ -0,0 +1,198 @@
+from . import URL, _as_url
+
+
+class _HostNode(object):
+    __slots__ = ('children', 'exact', 'wildcard')
+
+    def __init__(self):
+        self.children = {}
+        # Rules for this host and for its subdomains.
+        self.exact = []
+        self.wildcard = []
+
+
+class _PathNode(object):
+    __slots__ = ('children', 'rules')
+
+    def __init__(self):
+        self.children = {}
+        self.rules = []
+
+
+def _segments(path):
+    path = path.strip('/')
+    return path.split('/') if path else []
+
+
+class URLMatcher(object):
+    """
+    Set of rules which can be matched against urls. Every rule has id
+    and optional constraints:
+
+    host    exact host 'example.com' or '*.example.com' for any subdomain
+    path    path prefix, '/api' matches '/api' and '/api/v1',
+            but not '/apiv1'
+    scheme  scheme or collection of schemes
+    port    port or collection of ports. Urls without port have default
+            port of scheme.
+
+    Each constraint is indexed: hosts in trie of reversed labels, paths in
+    trie of segments, schemes and ports in buckets. For every url the index
+    with fewest candidate rules is used and only its candidates are checked,
+    so time of matching depends on number of candidates, not on number
+    of rules.
+    """
+
+    default_ports = URL.default_ports
+
+    def __init__(self, rules=()):
+        self._ids = []
+        # Constraints of every rule for final check.
+        self._rules = []
+        self._hosts = _HostNode()
+        self._any_host = []
+        self._paths = _PathNode()
+        self._schemes = {}
+        self._any_scheme = []
+        self._ports = {}
+        self._any_port = []
+        for rule in rules:
+            self.add(*rule)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, rule_id, host=None, path=None, scheme=None, port=None):
+        idx = len(self._ids)
+        self._ids.append(rule_id)
+
+        suffix = None
+        if host and host != '*':
+            host = host.lower()
+            wildcard = host.startswith('*.')
+            if wildcard:
+                host = host[2:]
+                suffix = '.' + host
+            node = self._hosts
+            for label in reversed(host.split('.')):
+                child = node.children.get(label)
+                if child is None:
+                    child = node.children[label] = _HostNode()
+                node = child
+            (node.wildcard if wildcard else node.exact).append(idx)
+            if wildcard:
+                host = None
+        else:
+            host = None
+            self._any_host.append(idx)
+
+        segments = _segments(path or '')
+        node = self._paths
+        for segment in segments:
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _PathNode()
+            node = child
+        node.rules.append(idx)
+        prefix = '/' + '/'.join(segments) if segments else None
+
+        schemes = self._bucket(self._schemes, self._any_scheme, idx,
+                               scheme, lambda scheme: scheme.lower())
+        ports = self._bucket(self._ports, self._any_port, idx, port, str)
+
+        self._rules.append((host, suffix, prefix, prefix and prefix + '/',
+                            schemes, ports))
+
+    @staticmethod
+    def _bucket(buckets, any_bucket, idx, values, normalize):
+        if values is None:
+            any_bucket.append(idx)
+            return None
+        if isinstance(values, (type(''), type(u''), int)):
+            values = (values,)
+        values = frozenset(normalize(value) for value in values)
+        for value in values:
+            buckets.setdefault(value, []).append(idx)
+        return values
+
+    def _host_candidates(self, host):
+        lists = [self._any_host]
+        if host:
+            labels = host.split('.')
+            last = len(labels) - 1
+            node = self._hosts
+            for depth in range(last, -1, -1):
+                node = node.children.get(labels[depth])
+                if node is None:
+                    break
+                lists.append(node.exact if depth == 0 else node.wildcard)
+        return lists
+
+    def _path_candidates(self, path):
+        node = self._paths
+        lists = [node.rules]
+        for segment in _segments(path):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            lists.append(node.rules)
+        return lists
+
+    def _match(self, host, host_lists, scheme, port, path):
+        if path[:1] != '/':
+            path = '/' + path
+        candidates = [
+            host_lists,
+            self._path_candidates(path),
+            [self._any_scheme, self._schemes.get(scheme, ())],
+            [self._any_port, self._ports.get(port, ())],
+        ]
+        # Start from the most selective index.
+        lists = min(candidates, key=lambda lists: sum(map(len, lists)))
+
+        rules = self._rules
+        matched = []
+        for rule_list in lists:
+            for idx in rule_list:
+                rule_host, suffix, prefix, prefix_dir, schemes, ports = \
+                    rules[idx]
+                if rule_host is not None and host != rule_host:
+                    continue
+                if suffix is not None and not host.endswith(suffix):
+                    continue
+                if prefix is not None and path != prefix and \
+                        not path.startswith(prefix_dir):
+                    continue
+                if schemes is not None and scheme not in schemes:
+                    continue
+                if ports is not None and port not in ports:
+                    continue
+                matched.append(idx)
+
+        ids = self._ids
+        return [ids[idx] for idx in sorted(matched)]
+
+    def match(self, url):
+        """Returns list of ids of all rules matching url in order
+        of adding. Url can be a string or url object.
+        """
+        url = _as_url(url)
+        scheme, host, port = url[0], url[2], url[3]
+        return self._match(host, self._host_candidates(host), scheme,
+                           port or self.default_ports.get(scheme, ''),
+                           url[4])
+
+    def match_many(self, urls):
+        """Same as match() for each url from iterable. Returns generator.
+        Host index is looked up once for every distinct host.
+        """
+        host_cache = {}
+        default_ports = self.default_ports
+        for url in urls:
+            url = _as_url(url)
+            scheme, host, port = url[0], url[2], url[3]
+            host_lists = host_cache.get(host)
+            if host_lists is None:
+                host_lists = host_cache[host] = self._host_candidates(host)
+            yield self._match(host, host_lists, scheme,
+                              port or default_ports.get(scheme, ''), url[4])
@@ -0,0 +1,109 @@
+from array import array
+from itertools import islice
+from multiprocessing import Pool
+
+from . import URL
+
+
+# Flags of encoded url.
+_DECODED = 1
+_INVALID = 2
+
+
+def encode_urls(urls):
+    """Pack urls to compact form which is cheap to pickle:
+    all components joined in one string, and array of their lengths
+    with flags for each url. None is encoded as invalid url.
+    """
+    parts = []
+    lengths = array('l')
+    for url in urls:
+        if url is None:
+            lengths.append(_INVALID)
+            continue
+        lengths.append(_DECODED if url[7] else 0)
+        for part in url[0:7]:
+            lengths.append(len(part))
+            parts.append(part)
+    return ''.join(parts), lengths
+
+
+def decode_urls(data, cls=URL):
+    """Unpack urls packed with encode_urls()."""
+    new = tuple.__new__
+    string, lengths = data
+    result = []
+    pos = idx = 0
+    total = len(lengths)
+    while idx < total:
+        flags = lengths[idx]
+        if flags & _INVALID:
+            result.append(None)
+            idx += 1
+            continue
+        parts = []
+        for length in lengths[idx + 1:idx + 8]:
+            parts.append(string[pos:pos + length])
+            pos += length
+        parts.append(bool(flags & _DECODED))
+        result.append(new(cls, parts))
+        idx += 8
+    return result
+
+
+def _parse_chunk(args):
+    cls, urls, validate, decode = args
+    urls = cls.parse_many(urls)
+    if decode:
+        urls = (url.decode() for url in urls)
+    if validate:
+        urls = [url if url.is_valid() else None for url in urls]
+    return encode_urls(urls)
+
+
+def _parse_indexed(args):
+    start, args = args
+    return start, _parse_chunk(args)
+
+
+def _chunks(urls, chunk_size, cls, validate, decode):
+    urls = iter(urls)
+    while True:
+        chunk = list(islice(urls, chunk_size))
+        if not chunk:
+            break
+        yield cls, chunk, validate, decode
+
+
+def parse_many(urls, processes=None, chunk_size=10000, ordered=True,
+               validate=False, decode=False, cls=URL, pool=None):
+    """Parse urls from iterable in worker processes. Returns generator.
+    Urls are sent back to parent in batches with encode_urls().
+
+    If validate is true, None is returned for invalid urls.
+    If decode is true, urls are decoded with decode() method.
+    If ordered is false, results are returned as soon as they are ready
+    in form of (index, url) pairs.
+    Existing multiprocessing pool can be passed, otherwise new pool with
+    given number of processes is created.
+    """
+    own_pool = pool is None
+    if own_pool:
+        pool = Pool(processes)
+
+    try:
+        chunks = _chunks(urls, chunk_size, cls, validate, decode)
+        if ordered:
+            for data in pool.imap(_parse_chunk, chunks):
+                for url in decode_urls(data, cls):
+                    yield url
+        else:
+            chunks = ((idx * chunk_size, args)
+                      for idx, args in enumerate(chunks))
+            for start, data in pool.imap_unordered(_parse_indexed, chunks):
+                for idx, url in enumerate(decode_urls(data, cls), start):
+                    yield idx, url
+    finally:
+        if own_pool:
+            pool.terminate()
+            pool.join()
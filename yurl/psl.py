@@ -0,0 +1,217 @@
+"""
+Public suffixes and registrable domains of hosts according to the Public
+Suffix List, https://publicsuffix.org/list/
+
+Rules are compiled to a trie of reversed labels. Compiled trie can be
+serialized with marshal, so full list is loaded fast on next start.
+Full list is bundled with yurl and used by default, its compiled trie
+is cached in __pycache__ like compiled modules.
+"""
+
+import io
+import marshal
+import os
+import sys
+
+from .utils import LRUCache, classify_host, host_to_ascii, HOST_NAME
+
+
+FORMAT = 1
+
+bundled_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'public_suffix_list.dat')
+
+
+def _bundled_cache_path():
+    # Marshal format depends on python version, so cache is tagged
+    # like compiled modules.
+    try:
+        tag = sys.implementation.cache_tag
+    except AttributeError:
+        tag = 'py{0}{1}'.format(*sys.version_info[:2])
+    if tag is None:
+        return None
+    return os.path.join(os.path.dirname(bundled_path), '__pycache__',
+                        'public_suffix_list.{0}.marshal'.format(tag))
+
+# Trie nodes are dicts: label -> child node. Empty label can't appear
+# in rules, so it is used as flag of the node. Hosts with empty labels
+# are never looked up.
+_RULE = 1
+_EXCEPTION = 2
+
+
+def _add_rule(trie, rule):
+    flag = _RULE
+    if rule[:1] == '!':
+        flag = _EXCEPTION
+        rule = rule[1:]
+    node = trie
+    for label in reversed(rule.split('.')):
+        node = node.setdefault(label, {})
+    node[''] = flag
+
+
+def compile_rules(lines):
+    """Builds trie from lines of the list. Internationalized rules are
+    added in both unicode and ascii forms.
+    """
+    trie = {}
+    for line in lines:
+        parts = line.split()
+        if not parts or parts[0].startswith('//'):
+            continue
+        rule = parts[0].lower()
+        _add_rule(trie, rule)
+
+        prefix = '!' if rule[:1] == '!' else ''
+        name = rule[len(prefix):]
+        try:
+            ascii_name = host_to_ascii(name)
+        except UnicodeError:
+            continue
+        if ascii_name != name:
+            _add_rule(trie, prefix + ascii_name)
+    return trie
+
+
+class PublicSuffixList(object):
+    """
+    Compiled public suffix list. Results for recently used hosts
+    are cached.
+    """
+
+    def __init__(self, trie, cache_size=10000):
+        self._trie = trie
+        self._cache = LRUCache(cache_size)
+
+    @classmethod
+    def parse(cls, text):
+        return cls(compile_rules(text.splitlines()))
+
+    @classmethod
+    def from_file(cls, path, cache_path=None):
+        """Loads list from file. If cache_path is given, compiled trie is
+        stored there and used instead of parsing while it is newer
+        than the list.
+        """
+        if cache_path is not None:
+            try:
+                if os.path.getmtime(cache_path) >= os.path.getmtime(path):
+                    with open(cache_path, 'rb') as f:
+                        return cls.loads(f.read())
+            except (OSError, IOError, ValueError, EOFError):
+                pass
+
+        with io.open(path, encoding='utf-8') as f:
+            psl = cls(compile_rules(f))
+
+        if cache_path is not None:
+            # Other processes can read cache while it is written, so
+            # complete file is renamed to cache_path.
+            tmp_path = '{0}.{1}.tmp'.format(cache_path, os.getpid())
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(psl.dumps())
+                os.rename(tmp_path, cache_path)
+            except (OSError, IOError):
+                try:
+                    os.remove(tmp_path)
+                except (OSError, IOError):
+                    pass
+        return psl
+
+    def dumps(self):
+        return marshal.dumps((FORMAT, self._trie))
+
+    @classmethod
+    def loads(cls, data):
+        version, trie = marshal.loads(data)
+        if version != FORMAT:
+            raise ValueError('Unknown format of compiled list.')
+        return cls(trie)
+
+    def _suffix_length(self, labels):
+        # Number of labels in public suffix. Rule '*' is implied,
+        # so it is at least one.
+        length = 1
+        node = self._trie
+        count = len(labels)
+        for depth in range(count):
+            child = node.get(labels[count - depth - 1])
+            wildcard = node.get('*')
+            if child is not None:
+                flag = child.get('')
+                if flag == _EXCEPTION:
+                    # Exception rule removes its first label.
+                    return depth
+                if flag == _RULE or wildcard is not None and \
+                        wildcard.get('') == _RULE:
+                    length = depth + 1
+                node = child
+            elif wildcard is not None:
+                if wildcard.get('') == _RULE:
+                    length = depth + 1
+                node = wildcard
+            else:
+                break
+        return length
+
+    def split(self, host):
+        """Returns public suffix and registrable domain of host. Both are
+        empty for ip addresses and registrable domain is empty if host
+        is public suffix itself.
+        """
+        result = self._cache.get(host)
+        if result is not None:
+            return result
+
+        result = ('', '')
+        name = host.rstrip('.').lower()
+        if name and classify_host(name)[0] == HOST_NAME:
+            labels = name.split('.')
+            # Malformed names like 'a..com' have no public suffix.
+            if '' not in labels:
+                length = self._suffix_length(labels)
+                suffix = '.'.join(labels[-length:])
+                if length < len(labels):
+                    result = (suffix, '.'.join(labels[-length - 1:]))
+                else:
+                    result = (suffix, '')
+        self._cache[host] = result
+        return result
+
+    def public_suffix(self, host):
+        return self.split(host)[0]
+
+    def registrable_domain(self, host):
+        return self.split(host)[1]
+
+    def cache_info(self):
+        return self._cache.info()
+
+
+_default = None
+
+
+def default_list():
+    """List loaded from bundled file on first use."""
+    global _default
+    if _default is None:
+        _default = PublicSuffixList.from_file(bundled_path,
+                                              _bundled_cache_path())
+    return _default
+
+
+def set_default_list(psl):
+    """Use given list for URL.public_suffix and URL.registrable_domain."""
+    global _default
+    _default = psl
+
+
+def public_suffix(host):
+    return default_list().split(host)[0]
+
+
+def registrable_domain(host):
+    return default_list().split(host)[1]
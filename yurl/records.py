@@ -0,0 +1,191 @@
+# Compact binary format for parsed urls.
+#
+# Layout (all integers are little-endian):
+#
+#     header      magic b'YURL', version, flags, 2 reserved bytes,
+#                 count, host dictionary offset, index offset (uint64 each)
+#     records     one per url
+#     hosts       varint count, then varint length and utf-8 bytes of hosts
+#     index       uint64 offset of every record
+#
+# Record starts with a byte of flags: bits 0-6 tell which of seven url parts
+# are present, bit 7 is decoded flag. Each present part is stored as varint
+# length and utf-8 bytes. If host dictionary is used, host is stored as
+# varint index in the dictionary.
+
+import mmap
+import struct
+
+from . import URL
+from .utils import _put_varint, _get_varint
+
+
+MAGIC = b'YURL'
+VERSION = 1
+
+_HOST_DICTIONARY = 1
+_DECODED = 0x80
+
+_header = struct.Struct('<4sBBxxQQQ')
+_offset = struct.Struct('<Q')
+
+
+def _encode_record(out, url, hosts):
+    flags = _DECODED if url[7] else 0
+    for idx in range(7):
+        if url[idx]:
+            flags |= 1 << idx
+    out.append(flags)
+
+    for idx in range(7):
+        part = url[idx]
+        if not part:
+            continue
+        if idx == 2 and hosts is not None:
+            code = hosts.get(part)
+            if code is None:
+                code = hosts[part] = len(hosts)
+            _put_varint(out, code)
+        else:
+            part = part.encode('utf-8')
+            _put_varint(out, len(part))
+            out += part
+
+
+def _decode_record(data, pos, hosts, cls):
+    # Data should be bytearray, so indexing returns integers.
+    # Returns url and position of next record.
+    flags = data[pos]
+    pos += 1
+    parts = []
+    for idx in range(7):
+        if not flags & (1 << idx):
+            parts.append('')
+            continue
+        value, pos = _get_varint(data, pos)
+        if idx == 2 and hosts is not None:
+            parts.append(hosts[value])
+        else:
+            parts.append(data[pos:pos + value].decode('utf-8'))
+            pos += value
+    parts.append(bool(flags & _DECODED))
+    return tuple.__new__(cls, parts), pos
+
+
+def dumps_many(urls, host_dictionary=True):
+    """Serialize url objects to bytes. With host_dictionary, every distinct
+    host is stored only once.
+    """
+    hosts = {} if host_dictionary else None
+    out = bytearray(_header.size)
+    offsets = []
+    for url in urls:
+        offsets.append(len(out))
+        _encode_record(out, url, hosts)
+
+    hosts_offset = len(out)
+    if hosts is None:
+        hosts = {}
+    _put_varint(out, len(hosts))
+    for host in sorted(hosts, key=hosts.get):
+        host = host.encode('utf-8')
+        _put_varint(out, len(host))
+        out += host
+
+    index_offset = len(out)
+    for offset in offsets:
+        out += _offset.pack(offset)
+
+    flags = _HOST_DICTIONARY if host_dictionary else 0
+    _header.pack_into(out, 0, MAGIC, VERSION, flags, len(offsets),
+                      hosts_offset, index_offset)
+    return bytes(out)
+
+
+class URLRecords(object):
+    """
+    Random access to urls serialized with dumps_many(). Buffer can be
+    bytes or memory-mapped file. Urls are decoded only on access.
+    """
+
+    # Number of records copied from buffer at once while iterating.
+    _window = 4096
+
+    def __init__(self, buffer, cls=URL):
+        magic, version, flags, count, hosts_offset, index_offset = \
+            _header.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Not a url records buffer.')
+
+        self.buffer = buffer
+        self.cls = cls
+        self._count = count
+        self._hosts_offset = hosts_offset
+        self._index_offset = index_offset
+        self._hosts = None
+        if flags & _HOST_DICTIONARY:
+            self._hosts = self._load_hosts()
+
+    def _load_hosts(self):
+        data = bytearray(self.buffer[self._hosts_offset:self._index_offset])
+        count, pos = _get_varint(data, 0)
+        hosts = []
+        for _ in range(count):
+            length, pos = _get_varint(data, pos)
+            hosts.append(data[pos:pos + length].decode('utf-8'))
+            pos += length
+        return hosts
+
+    def __len__(self):
+        return self._count
+
+    def _record_offset(self, idx):
+        # Records end where host dictionary starts.
+        if idx == self._count:
+            return self._hosts_offset
+        position = self._index_offset + idx * _offset.size
+        return _offset.unpack_from(self.buffer, position)[0]
+
+    def __getitem__(self, idx):
+        count = self._count
+        if idx < 0:
+            idx += count
+        if not 0 <= idx < count:
+            raise IndexError('url index out of range')
+
+        data = bytearray(self.buffer[self._record_offset(idx):
+                                     self._record_offset(idx + 1)])
+        return _decode_record(data, 0, self._hosts, self.cls)[0]
+
+    def __iter__(self):
+        # Records are stored one after another, so they are copied
+        # and decoded in windows of _window records.
+        hosts, cls = self._hosts, self.cls
+        count = self._count
+        idx = 0
+        while idx < count:
+            stop = min(idx + self._window, count)
+            data = bytearray(self.buffer[self._record_offset(idx):
+                                         self._record_offset(stop)])
+            pos = 0
+            for _ in range(stop - idx):
+                url, pos = _decode_record(data, pos, hosts, cls)
+                yield url
+            idx = stop
+
+
+def loads_many(data, cls=URL):
+    """Deserialize all urls from bytes produced by dumps_many()."""
+    return list(URLRecords(data, cls))
+
+
+def dump(urls, path, host_dictionary=True):
+    with open(path, 'wb') as f:
+        f.write(dumps_many(urls, host_dictionary))
+
+
+def load(path, cls=URL):
+    """Memory-map file written by dump(). Returns URLRecords."""
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return URLRecords(buffer, cls)
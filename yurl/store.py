@@ -0,0 +1,217 @@
+import re
+import sys
+from bisect import bisect_left, bisect_right, insort
+from os.path import commonprefix
+
+from . import URL, _as_url
+from .utils import _put_varint, _get_varint
+
+
+_full_path_re = re.compile(r'([^?#]*)\??([^#]*)#?(.*)', re.DOTALL).match
+
+
+def _encode_block(keys):
+    # Front coding: every key is stored as length of prefix shared with
+    # previous key and the rest of the key.
+    out = bytearray()
+    prev = b''
+    for key in keys:
+        shared = len(commonprefix([prev, key]))
+        _put_varint(out, shared)
+        _put_varint(out, len(key) - shared)
+        out += key[shared:]
+        prev = key
+    return bytes(out)
+
+
+def _iter_block(block):
+    data = bytearray(block)
+    prev = b''
+    pos, size = 0, len(data)
+    while pos < size:
+        # Most of lengths fit in one byte.
+        shared = data[pos]
+        if shared < 0x80:
+            pos += 1
+        else:
+            shared, pos = _get_varint(data, pos)
+        length = data[pos]
+        if length < 0x80:
+            pos += 1
+        else:
+            length, pos = _get_varint(data, pos)
+        prev = prev[:shared] + block[pos:pos + length]
+        pos += length
+        yield prev
+
+
+def _decode_block(block):
+    return list(_iter_block(block))
+
+
+def _block_contains(block, key):
+    # Keys are sorted, so search can be stopped on first greater key.
+    for item in _iter_block(block):
+        if item >= key:
+            return item == key
+    return False
+
+
+class _Bucket(object):
+    """Sorted set of keys for one origin. Keys are kept in front-coded
+    blocks. New keys are collected in small sorted list and merged to
+    blocks when it is full.
+    """
+    __slots__ = ('firsts', 'blocks', 'pending')
+
+    def __init__(self):
+        self.firsts = []
+        self.blocks = []
+        self.pending = []
+
+    def _find_block(self, key):
+        return bisect_right(self.firsts, key) - 1
+
+    def __contains__(self, key):
+        pending = self.pending
+        idx = bisect_left(pending, key)
+        if idx < len(pending) and pending[idx] == key:
+            return True
+
+        idx = self._find_block(key)
+        if idx < 0:
+            return False
+        return _block_contains(self.blocks[idx], key)
+
+    def add(self, key, block_size):
+        if key in self:
+            return False
+        insort(self.pending, key)
+        if len(self.pending) >= block_size:
+            self.flush(block_size)
+        return True
+
+    def flush(self, block_size):
+        # Group pending keys by blocks they should be inserted to.
+        groups = {}
+        for key in self.pending:
+            groups.setdefault(max(self._find_block(key), 0), []).append(key)
+        self.pending = []
+
+        if not self.blocks:
+            self.firsts.append(b'')
+            self.blocks.append(b'')
+
+        # Rebuild affected blocks from the end, so indices stay valid.
+        for idx in sorted(groups, reverse=True):
+            keys = sorted(_decode_block(self.blocks[idx]) + groups[idx])
+            chunks = [keys[start:start + block_size]
+                      for start in range(0, len(keys), block_size)]
+            self.firsts[idx:idx + 1] = [chunk[0] for chunk in chunks]
+            self.blocks[idx:idx + 1] = [_encode_block(chunk)
+                                        for chunk in chunks]
+
+    def __iter__(self):
+        # Merge blocks with pending keys.
+        pending = self.pending
+        pos = 0
+        for block in self.blocks:
+            for key in _iter_block(block):
+                while pos < len(pending) and pending[pos] < key:
+                    yield pending[pos]
+                    pos += 1
+                yield key
+        for key in pending[pos:]:
+            yield key
+
+    def memory_usage(self):
+        size = sys.getsizeof(self)
+        for items in (self.firsts, self.blocks, self.pending):
+            size += sys.getsizeof(items)
+            size += sum(sys.getsizeof(item) for item in items)
+        return size
+
+
+class URLStore(object):
+    """
+    Memory-efficient set of urls. Urls are grouped by host and then by
+    other parts of authority and scheme. Inside the group only path, query
+    and fragment are stored in sorted front-coded blocks, so common prefixes
+    of paths are stored once per block. Urls are reconstructed on access.
+    """
+
+    def __init__(self, block_size=32, encoding='utf-8', cls=URL):
+        self.block_size = block_size
+        self.encoding = encoding
+        self.cls = cls
+        # host -> (scheme, userinfo, port) -> bucket
+        self._hosts = {}
+        self._len = 0
+
+    def _split(self, url):
+        url = _as_url(url, self.cls)
+        return url[2], (url[0], url[1], url[3]), \
+            url.full_path.encode(self.encoding)
+
+    def add(self, url):
+        """Add url to store. Returns False if url already present."""
+        host, origin, key = self._split(url)
+        buckets = self._hosts.get(host)
+        if buckets is None:
+            buckets = self._hosts[host] = {}
+        bucket = buckets.get(origin)
+        if bucket is None:
+            bucket = buckets[origin] = _Bucket()
+
+        if bucket.add(key, self.block_size):
+            self._len += 1
+            return True
+        return False
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url):
+        host, origin, key = self._split(url)
+        bucket = self._hosts.get(host, {}).get(origin)
+        return bucket is not None and key in bucket
+
+    def __len__(self):
+        return self._len
+
+    def hosts(self):
+        return list(self._hosts)
+
+    def iter_host(self, host):
+        """Urls with given host. Urls with the same scheme, userinfo
+        and port are sorted.
+        """
+        new = tuple.__new__
+        cls, encoding = self.cls, self.encoding
+        host = host.lower()
+        for (scheme, userinfo, port), bucket in self._hosts.get(
+                host, {}).items():
+            for key in bucket:
+                path, query, fragment = _full_path_re(
+                    key.decode(encoding)).groups()
+                yield new(cls, (scheme, userinfo, host, port, path, query,
+                                fragment, False))
+
+    def __iter__(self):
+        for host in self._hosts:
+            for url in self.iter_host(host):
+                yield url
+
+    def memory_usage(self):
+        """Approximate number of bytes used by store."""
+        size = sys.getsizeof(self._hosts)
+        for host, buckets in self._hosts.items():
+            size += sys.getsizeof(host) + sys.getsizeof(buckets)
+            for origin, bucket in buckets.items():
+                size += sys.getsizeof(origin) + bucket.memory_usage()
+                size += sum(sys.getsizeof(part) for part in origin)
+        return size
+
+    def bytes_per_url(self):
+        return self.memory_usage() / float(self._len or 1)
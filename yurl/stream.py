@@ -0,0 +1,64 @@
+import mmap
+
+from . import URL
+from .utils import split_urls
+
+
+def iter_url_chunks(path, field=6, separator=None, chunk_size=1 << 20,
+                    raw=False, encoding='utf-8', errors='replace', cls=URL):
+    """Read urls from given field of every line of the file.
+    File is memory-mapped and processed by chunks of about chunk_size
+    bytes, so memory usage is bounded regardless of file size.
+    Yields lists of parsed urls, one for each chunk. If raw is true,
+    tuples from split_url() are yielded instead of url objects.
+
+    Fields are separated by whitespaces by default. Default field
+    is request target in common and combined log formats:
+    127.0.0.1 - - [10/Oct/2000:13:55:36 -0700] "GET /path HTTP/1.0" 200 5
+    Lines with fewer fields are skipped.
+    """
+    maxsplit = field + 1
+
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file can not be mapped.
+            return
+
+        try:
+            start, size = 0, len(data)
+            while start < size:
+                stop = start + chunk_size
+                if stop < size:
+                    # Cut chunk on last line end.
+                    line_end = data.rfind(b'\n', start, stop)
+                    if line_end < 0:
+                        # Line is longer than chunk.
+                        line_end = data.find(b'\n', stop)
+                    stop = size if line_end < 0 else line_end + 1
+                else:
+                    stop = size
+
+                targets = []
+                for line in data[start:stop].splitlines():
+                    fields = line.split(separator, maxsplit)
+                    if len(fields) > field:
+                        targets.append(fields[field].decode(encoding, errors))
+                start = stop
+
+                if raw:
+                    yield list(split_urls(targets))
+                else:
+                    yield list(cls.parse_many(targets))
+        finally:
+            data.close()
+
+
+def iter_urls(path, field=6, separator=None, chunk_size=1 << 20,
+              raw=False, encoding='utf-8', errors='replace', cls=URL):
+    """Same as iter_url_chunks(), but yields urls one by one."""
+    for chunk in iter_url_chunks(path, field, separator, chunk_size,
+                                 raw, encoding, errors, cls):
+        for url in chunk:
+            yield url
@@ -1,15 +1,96 @@
 from __future__ import print_function, unicode_literals
 import re
-from collections import deque
+from collections import namedtuple, OrderedDict
+from threading import Lock
 
 
 def _restore(cls, args):
     return tuple.__new__(cls, args)
 
 
+CacheInfo = namedtuple('CacheInfo', 'hits misses evictions maxsize currsize')
+
+
+class LRUCache(object):
+    """Bounded mapping which evicts least recently used items.
+    Both lookup and insertion are O(1). Counts hits, misses and evictions.
+    Cache with maxsize less than 1 stores nothing. Caches are shared
+    between threads, so changes are guarded with lock.
+    """
+    __slots__ = ('maxsize', 'hits', 'misses', 'evictions', '_data', '_lock')
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = self.misses = self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    if hasattr(OrderedDict, 'move_to_end'):
+        def get(self, key, default=None):
+            data = self._data
+            lock = self._lock
+            lock.acquire()
+            try:
+                value = data[key]
+                data.move_to_end(key)
+                self.hits += 1
+                return value
+            except KeyError:
+                self.misses += 1
+                return default
+            finally:
+                lock.release()
+    else:
+        def get(self, key, default=None):
+            data = self._data
+            lock = self._lock
+            lock.acquire()
+            try:
+                # Pop and store again is the only way to move item
+                # to the end in python 2.
+                value = data.pop(key)
+                data[key] = value
+                self.hits += 1
+                return value
+            except KeyError:
+                self.misses += 1
+                return default
+            finally:
+                lock.release()
+
+    def __setitem__(self, key, value):
+        data = self._data
+        lock = self._lock
+        lock.acquire()
+        try:
+            if key not in data and len(data) >= self.maxsize:
+                if not data:
+                    return
+                data.popitem(last=False)
+                self.evictions += 1
+            data[key] = value
+        finally:
+            lock.release()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions,
+                         self.maxsize, len(self._data))
+
+
 # This is not validating regexp.
 # It splits url to unambiguous parts according RFC.
-_split_re = re.compile(r'''
+_split_pattern = r'''
     (?:([^:/?#]+):)?            # scheme
     (?://                       # authority
         (?:([^/?\#@]*)@)?       # userinfo
@@ -18,7 +99,74 @@ _split_re = re.compile(r'''
     ([^?\#]*)                   # path
     \??([^\#]*)                 # query
     \#?(.*)                     # fragment
-    ''', re.VERBOSE | re.DOTALL).match
+    '''
+_split_re = re.compile(_split_pattern, re.VERBOSE | re.DOTALL).match
+# Same regexp for bytes and other buffers.
+_split_bytes_re = re.compile(_split_pattern.encode('ascii'),
+                             re.VERBOSE | re.DOTALL).match
+_text_type = type('')
+
+
+InternInfo = namedtuple('InternInfo', 'hits misses rejected maxsize currsize')
+
+
+class InternTable(object):
+    """Bounded table of strings. Calling the table returns stored string
+    equal to given one, so equal strings share one object. When the table
+    is full, new strings are returned as is.
+    """
+    __slots__ = ('maxsize', 'hits', 'misses', 'rejected', '_table')
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = self.misses = self.rejected = 0
+        self._table = {}
+
+    def __call__(self, value):
+        if not value:
+            return value
+        table = self._table
+        interned = table.get(value)
+        if interned is not None:
+            self.hits += 1
+            return interned
+        if len(table) >= self.maxsize:
+            self.rejected += 1
+            return value
+        self.misses += 1
+        table[value] = value
+        return value
+
+    def __len__(self):
+        return len(self._table)
+
+    def clear(self):
+        self._table.clear()
+        self.hits = self.misses = self.rejected = 0
+
+    def info(self):
+        return InternInfo(self.hits, self.misses, self.rejected,
+                          self.maxsize, len(self._table))
+
+
+# Unsigned integers of variable length, 7 bits per byte.
+
+def _put_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _get_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
 
 
 def split_url(url):
@@ -38,6 +186,63 @@ def split_url(url):
     return groups
 
 
+def split_url_spans(url):
+    """Same as split_url(), but returns start and end positions
+    of each part in url instead of strings: tuple of 14 integers.
+    Url can be a string, bytes or other buffer.
+    """
+    if isinstance(url, _text_type):
+        match = _split_re(url)
+    else:
+        try:
+            match = _split_bytes_re(url)
+        except TypeError:
+            # Python 2 regexps don't accept memoryview.
+            url = _to_bytes(url)
+            match = _split_bytes_re(url)
+    spans = []
+    for group in range(1, 8):
+        start, end = match.span(group)
+        if start < 0:
+            start = end = 0
+        spans += (start, end)
+
+    host_start, host_end = spans[4:6]
+    if isinstance(url, _text_type):
+        port_idx = url.rfind(':', host_start, host_end)
+        port = url[port_idx + 1:host_end]
+    else:
+        # Buffers like memoryview have no string methods.
+        host = match.group(3) or b''
+        port_idx = host.rfind(b':')
+        port = host[port_idx + 1:]
+        port_idx += host_start
+    if port_idx >= host_start:
+        if not port or port.isdigit():
+            spans[5:8] = port_idx, port_idx + 1, host_end
+
+    return tuple(spans)
+
+
+def split_urls(urls):
+    """Same as split_url() for each url from iterable, but faster.
+    Returns generator.
+    """
+    split = _split_re
+    for url in urls:
+        groups = split(url).groups('')
+
+        # Most urls have no port at all, skip rfind and slicing for them.
+        host = groups[2]
+        if ':' in host:
+            port_idx = host.rfind(':')
+            port = host[port_idx + 1:]
+            if not port or port.isdigit():
+                groups = groups[0:2] + (host[:port_idx], port) + groups[4:7]
+
+        yield groups
+
+
 def decode_url(url, encoding='utf-8', errors='replace'):
     """Decode percent-encoded unreserved chars.
     Can be applied on anytime before or after parsing.
@@ -52,6 +257,10 @@ def decode_url(url, encoding='utf-8', errors='replace'):
                                     for a in _hexdig for b in _hexdig
                                     if int(a + b, 16) not in _skip)
 
+    return _decode_hexmap(url, hexmap, encoding, errors)
+
+
+def _decode_hexmap(url, hexmap, encoding, errors):
     result = ''
     last = 0
     encoded = bytearray()
@@ -112,17 +321,499 @@ def decode_url_component(url, encoding=None, errors='replace'):
     return result + url[last:]
 
 
+def _to_bytes(buffer):
+    if isinstance(buffer, bytes):
+        return buffer
+    if isinstance(buffer, memoryview):
+        return buffer.tobytes()
+    return bytes(buffer)
+
+
+def _decode_buffer(buffer, encoding, errors):
+    try:
+        return _text_type(buffer, encoding, errors)
+    except TypeError:
+        # Python 2 can't decode memoryview directly.
+        return _to_bytes(buffer).decode(encoding, errors)
+
+
+def _decode_bytes(url, hexmap, encoding, errors):
+    parts = _to_bytes(url).split(b'%')
+    result = bytearray(parts[0])
+    for idx in range(1, len(parts)):
+        part = parts[idx]
+        code = hexmap.get(part[:2])
+        if code is None:
+            result += b'%'
+            result += part
+        else:
+            result.append(code)
+            result += part[2:]
+    return result.decode(encoding, errors)
+
+
+def decode_url_bytes(url, encoding='utf-8', errors='replace'):
+    """Same as decode_url() for bytes or other buffer. Returns string,
+    buffer is decoded only once after percent-decoding.
+    """
+    global _all_bytes_hexmap
+    try:
+        hexmap = _all_bytes_hexmap
+    except NameError:
+        decode_url('')
+        hexmap = _all_bytes_hexmap = dict(
+            (key.encode('ascii'), code) for key, code in _all_hexmap.items())
+
+    return _decode_bytes(url, hexmap, encoding, errors)
+
+
+def decode_url_component_bytes(url, encoding='utf-8', errors='replace'):
+    """Decode all percent-encoded chars of bytes or other buffer.
+    Returns string.
+    """
+    global _full_bytes_hexmap
+    try:
+        hexmap = _full_bytes_hexmap
+    except NameError:
+        _hexdig = '0123456789ABCDEFabcdef'
+        hexmap = _full_bytes_hexmap = dict(
+            ((a + b).encode('ascii'), int(a + b, 16))
+            for a in _hexdig for b in _hexdig)
+
+    return _decode_bytes(url, hexmap, encoding, errors)
+
+
+def decode_query_component(value, encoding='utf-8', errors='replace'):
+    """Decode key or value of query string. Unlike decode_url_component()
+    all percent-encoded chars are decoded in one pass and '+' is decoded
+    as space.
+    """
+    global _full_hexmap
+    try:
+        hexmap = _full_hexmap
+    except NameError:
+        # Union of decode_url() and decode_url_component() tables.
+        _hexdig = '0123456789ABCDEFabcdef'
+        hexmap = _full_hexmap = dict((a + b, int(a + b, 16))
+                                     for a in _hexdig for b in _hexdig)
+
+    if '+' in value:
+        value = value.replace('+', ' ')
+    if '%' not in value:
+        return value
+    return _decode_hexmap(value, hexmap, encoding, errors)
+
+
+try:
+    _is_ascii = str.isascii
+except AttributeError:
+    _is_ascii = re.compile('[\\x00-\\x7f]*\\Z').match
+
+
+_unreserved = ('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+               '0123456789-._~')
+
+
+def _make_quoter(safe):
+    # Strings which consist only of safe chars are returned as is.
+    is_safe = re.compile('[{0}]*\\Z'.format(re.escape(safe))).match
+    table = ['%c' % byte if '%c' % byte in safe else '%{0:02X}'.format(byte)
+             for byte in range(256)]
+    # Ascii strings can be encoded without converting to bytes
+    # (all encodings suitable for urls are ascii-compatible).
+    ascii_table = dict((byte, table[byte]) for byte in range(128)
+                       if len(table[byte]) > 1)
+
+    def quote(value, encoding='utf-8'):
+        if not isinstance(value, _text_type):
+            # Byte strings, native strings of python 2 among them.
+            value = value.decode(encoding)
+        if is_safe(value):
+            return value
+        if _is_ascii(value):
+            return value.translate(ascii_table)
+        return ''.join([table[byte]
+                        for byte in bytearray(value.encode(encoding))])
+
+    return quote
+
+
+_sub_delims = "!$&'()*+,;="
+
+_quoters = {
+    'userinfo': _make_quoter(_unreserved + _sub_delims + ':'),
+    'host': _make_quoter(_unreserved + _sub_delims),
+    'path': _make_quoter(_unreserved + _sub_delims + ':@/'),
+    'query': _make_quoter(_unreserved + _sub_delims + ':@/?'),
+    # '&', '=' and '+' have special meaning in query parameters.
+    'query_key': _make_quoter(_unreserved + "!$'()*,;:@/?"),
+    'query_value': _make_quoter(_unreserved + "!$'()*,;:@/?="),
+    'fragment': _make_quoter(_unreserved + _sub_delims + ':@/?'),
+}
+_quote_query_key = _quoters['query_key']
+_quote_query_value = _quoters['query_value']
+
+
+def encode_url_component(value, component='path', encoding='utf-8'):
+    """Percent-encode all chars which are not allowed in given url
+    component: userinfo, host, path, query, query_key, query_value
+    or fragment. Strings without such chars are returned as is.
+    """
+    return _quoters[component](value, encoding)
+
+
+class QueryParams(tuple):
+    """Immutable ordered multi-dict of decoded query parameters.
+    Items are (key, value) pairs.
+    """
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        for name, value in self:
+            if name == key:
+                return value
+        return default
+
+    def getall(self, key):
+        return [value for name, value in self if name == key]
+
+    def keys(self):
+        seen = set()
+        return [name for name, _ in self
+                if not (name in seen or seen.add(name))]
+
+    def __contains__(self, key):
+        for name, _ in self:
+            if name == key:
+                return True
+        return False
+
+    def to_dict(self):
+        """Dict with first value for every key."""
+        return dict(reversed(self))
+
+
+_query_cache = LRUCache(64)
+
+
+def parse_query(query, encoding='utf-8', errors='replace'):
+    """Split query string to QueryParams with decoded keys and values.
+    Results for default encoding are cached.
+    """
+    cached = encoding == 'utf-8' and errors == 'replace'
+    if cached:
+        params = _query_cache.get(query)
+        if params is not None:
+            return params
+
+    params = []
+    for part in query.split('&'):
+        if part:
+            key, _, value = part.partition('=')
+            params.append((decode_query_component(key, encoding, errors),
+                           decode_query_component(value, encoding, errors)))
+    params = QueryParams(params)
+
+    if cached:
+        _query_cache[query] = params
+    return params
+
+
+def _query_pairs(params):
+    if hasattr(params, 'items'):
+        params = params.items()
+    return [(key, '{0}'.format(value) if value is not None else None)
+            for key, value in params]
+
+
+def encode_query(params, encoding='utf-8'):
+    """Build query string from mapping or iterable of pairs.
+    Pairs with None value are encoded without '='.
+    """
+    parts = []
+    for key, value in _query_pairs(params):
+        key = _quote_query_key(key, encoding)
+        if value is None:
+            parts.append(key)
+        else:
+            parts.append(key + '=' + _quote_query_value(value, encoding))
+    return '&'.join(parts)
+
+
+def remove_query_params(query, keys, encoding='utf-8'):
+    """Remove parameters with given keys from query string.
+    Values of other parameters are not decoded.
+    """
+    keys = set(keys)
+    parts = []
+    for part in query.split('&'):
+        if part:
+            key = part.partition('=')[0]
+            if '%' in key or '+' in key:
+                key = decode_query_component(key, encoding)
+            if key not in keys:
+                parts.append(part)
+    return '&'.join(parts)
+
+
+def update_query(query, params, encoding='utf-8'):
+    """Replace parameters in query string with given ones. First parameter
+    with each key is replaced in place and others with that key are
+    removed. Parameters with new keys are appended to end.
+    """
+    keys = []
+    replacements = {}
+    for key, value in _query_pairs(params):
+        if key not in replacements:
+            keys.append(key)
+            replacements[key] = []
+        replacements[key].append(encode_query(((key, value),), encoding))
+
+    parts = []
+    for part in query.split('&'):
+        if part:
+            key = part.partition('=')[0]
+            if '%' in key or '+' in key:
+                key = decode_query_component(key, encoding)
+            if key in replacements:
+                # None marks keys which are already replaced.
+                parts.extend(replacements[key] or ())
+                replacements[key] = None
+            else:
+                parts.append(part)
+    for key in keys:
+        parts.extend(replacements[key] or ())
+    return '&'.join(parts)
+
+
+# Kinds of host.
+HOST_EMPTY = ''
+HOST_NAME = 'name'
+HOST_IPV4 = 'ipv4'
+HOST_IPV6 = 'ipv6'
+HOST_IPVFUTURE = 'ipvfuture'
+# Host in brackets which is not valid ip literal.
+HOST_INVALID = 'invalid'
+
+_ipv4_re = re.compile(r'([0-9]+)\.([0-9]+)\.([0-9]+)\.([0-9]+)\Z').match
+_h16_re = re.compile(r'[0-9a-fA-F]{1,4}\Z').match
+_ipvfuture_re = re.compile(
+    r"[vV][0-9a-fA-F]+\.[a-zA-Z0-9\-._~!$&'()*+,;=:]+\Z").match
+
+
+def _parse_ipv4(host):
+    # Octets with leading zeros are accepted as decimal numbers.
+    match = _ipv4_re(host)
+    if match:
+        octets = [int(octet, 10) for octet in match.groups()]
+        if max(octets) < 256:
+            return bytes(bytearray(octets))
+    return None
+
+
+def _parse_ipv6(address):
+    if '::' in address:
+        if address.count('::') > 1:
+            return None
+        left, right = address.split('::')
+        left = left.split(':') if left else []
+        right = right.split(':') if right else []
+    else:
+        left, right = address.split(':'), None
+
+    # Last 32 bits can be written as ipv4.
+    last = right if right is not None else left
+    ipv4 = None
+    if last and '.' in last[-1]:
+        ipv4 = _parse_ipv4(last.pop())
+        if ipv4 is None:
+            return None
+
+    groups = left + (right or [])
+    total = len(groups) + (2 if ipv4 else 0)
+    # '::' stands for at least one group.
+    if total != 8 if right is None else total > 7:
+        return None
+    for group in groups:
+        if not _h16_re(group):
+            return None
+
+    packed = _pack_groups(left)
+    tail = _pack_groups(right or [])
+    if ipv4:
+        tail += bytearray(ipv4)
+    packed += bytearray(16 - len(packed) - len(tail)) + tail
+    return bytes(packed)
+
+
+def _pack_groups(groups):
+    packed = bytearray()
+    for group in groups:
+        value = int(group, 16)
+        packed.append(value >> 8)
+        packed.append(value & 0xff)
+    return packed
+
+
+def _parse_host(host):
+    if host[:1] == '[' and host[-1:] == ']':
+        literal = host[1:-1]
+        if _ipvfuture_re(literal):
+            return HOST_IPVFUTURE, None
+        packed = _parse_ipv6(literal)
+        if packed is None:
+            return HOST_INVALID, None
+        return HOST_IPV6, packed
+
+    packed = _parse_ipv4(host)
+    if packed is None:
+        return HOST_NAME, None
+    return HOST_IPV4, packed
+
+
+_empty_host = (HOST_EMPTY, None)
+_name_host = (HOST_NAME, None)
+_host_cache = LRUCache(10000)
+
+
+def classify_host(host):
+    """Returns kind of host and packed ip address or None.
+    Results for ip addresses are cached.
+    """
+    if not host:
+        return _empty_host
+    # Names are by far most common. They can't end with digit
+    # or bracket unless they look like ipv4.
+    last = host[-1]
+    if last != ']' and not '0' <= last <= '9':
+        return _name_host
+
+    result = _host_cache.get(host)
+    if result is None:
+        result = _host_cache[host] = _parse_host(host)
+    return result
+
+
+# Other dots which separate labels in internationalized hosts.
+_idna_dots_re = re.compile('[\u3002\uff0e\uff61]')
+_idna_cache = LRUCache(10000)
+
+
+def host_to_ascii(host):
+    """Converts internationalized host to ascii form with punycode labels.
+    Raises UnicodeError for labels which can't be converted.
+    Converted labels are cached.
+    """
+    if _is_ascii(host) or host[:1] == '[':
+        return host
+
+    from encodings.idna import ToASCII
+
+    labels = _idna_dots_re.sub('.', host).split('.')
+    for idx, label in enumerate(labels):
+        if _is_ascii(label):
+            continue
+        converted = _idna_cache.get(label)
+        if converted is None:
+            converted = ToASCII(label).decode('ascii')
+            _idna_cache[label] = converted
+        labels[idx] = converted
+    return '.'.join(labels)
+
+
+def host_to_unicode(host):
+    """Converts punycode labels of host to unicode.
+    Labels which can't be converted are left as is.
+    Converted labels are cached.
+    """
+    if 'xn--' not in host.lower():
+        return host
+
+    from encodings.idna import ToUnicode
+
+    labels = host.split('.')
+    for idx, label in enumerate(labels):
+        if label[:4].lower() != 'xn--':
+            continue
+        converted = _idna_cache.get(label)
+        if converted is None:
+            try:
+                converted = ToUnicode(label)
+            except UnicodeError:
+                converted = label
+            _idna_cache[label] = converted
+        labels[idx] = converted
+    return '.'.join(labels)
+
+
+def normalize_percent_encoding(value):
+    """Decode percent-encoded unreserved chars and uppercase hexadecimal
+    digits of all other percent-encodings (rfc3986 section 6.2.2.2).
+    """
+    if '%' not in value:
+        return value
+
+    global _normal_pct_map
+    try:
+        pctmap = _normal_pct_map
+    except NameError:
+        _hexdig = '0123456789ABCDEFabcdef'
+        pctmap = _normal_pct_map = {}
+        for a in _hexdig:
+            for b in _hexdig:
+                char = '%c' % int(a + b, 16)
+                if char not in _unreserved:
+                    char = '%' + (a + b).upper()
+                pctmap[a + b] = char
+
+    parts = value.split('%')
+    for idx in range(1, len(parts)):
+        part = parts[idx]
+        char = pctmap.get(part[:2])
+        if char is None:
+            parts[idx] = '%' + part
+        else:
+            parts[idx] = char + part[2:]
+    return ''.join(parts)
+
+
+def _has_dot_segments(path):
+    # Cheap check without false negatives. It is also true for segments
+    # which only start with dot, like '/.git'.
+    return '/.' in path or path[:1] == '.'
+
+
 def remove_dot_segments(path):
-    stack = deque()
-    last = 0
+    # Most of paths have no dot segments at all.
+    if '/.' not in path and path[:1] != '.':
+        return path
+
+    stack = []
     for segment in path.split('/'):
         if segment == '.':
             pass
         elif segment == '..':
-            if len(stack):
+            if stack:
                 stack.pop()
         else:
             stack.append(segment)
     if path.endswith(('/.', '/..')):
         stack.append('')
     return '/'.join(stack)
+
+
+def join_dot_segments(directory, path):
+    """Same as remove_dot_segments(directory + path), where directory is
+    empty or ends with slash. Paths without dot segments are just
+    concatenated.
+    """
+    if _has_dot_segments(directory):
+        return remove_dot_segments(directory + path)
+    return _join_dot_segments(directory, path)
+
+
+def _join_dot_segments(directory, path):
+    # Directory should be free of dot segments.
+    if _has_dot_segments(path):
+        return remove_dot_segments(directory + path)
+    return directory + path